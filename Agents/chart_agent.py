@@ -1,141 +1,281 @@
-import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
+import numpy as np
 import pandas as pd
-import os
+import plotly.graph_objects as go
 
-class ChartAgent:
-    def __init__(self):
-        self.df = None
-
-    def _split_single_text_column(self, df):
-        """
-        If the DataFrame has exactly one column and that column (or its name)
-        looks like a comma-separated header, split it into multiple columns.
-        """
-        if df.shape[1] != 1:
-            return df
-
-        col_name = df.columns[0]
-        first_vals = df.iloc[:, 0].astype(str)
-
-        # Heuristics: header-like column name OR first row contains commas
-        if ("," in col_name) or (first_vals.str.contains(",").any()):
-            # Determine header: if col_name contains commas, use that; else try to use first row as header
-            if "," in col_name:
-                new_cols = [c.strip() for c in col_name.split(",")]
-                # If the header got folded into the column name, then data begins at first row
-                new_df = df.iloc[:, 0].str.split(",", expand=True)
-                new_df.columns = new_cols[: new_df.shape[1]]
-                # If the header row is present as first row (duplicate), drop it if it equals header tokens
-                # Check first row content
-                first_row = new_df.iloc[0].astype(str).tolist()
-                if all([a == b for a, b in zip(first_row, new_cols[: len(first_row)])]):
-                    new_df = new_df.iloc[1:].reset_index(drop=True)
-                return new_df
-            else:
-                # Use first row as header
-                splitted = df.iloc[:, 0].str.split(",", expand=True)
-                header = splitted.iloc[0].astype(str).tolist()
-                new_df = splitted.iloc[1:].reset_index(drop=True)
-                new_df.columns = [h.strip() for h in header]
-                return new_df
+from Core.chart_cache import chart_cache as shared_chart_cache
+from Core.dataset import Dataset
+from Core.downsample import density, lttb, m4, position_bins, time_buckets
+from Core.render import DPI, figure_bytes, new_figure, save_figure
 
-        return df
+FIG_WIDTH = 10  # inches
 
-    def receive_data(self, df):
-        """Store the dataset; attempt to normalize if it's a single comma-joined column."""
-        if df is None:
-            self.df = None
-            return
 
-        df = df.copy()
-        df.columns = df.columns.str.strip()
-
-        # If the CSV was parsed into one column that contains commas, split it
-        df = self._split_single_text_column(df)
-
-        # Convert Date column if present
-        if "Date" in df.columns:
-            df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+class ChartAgent:
+    def __init__(self, line_reduction="m4", max_bars=60, hist_bins=20, max_scatter=20_000, chart_cache=None,
+                 max_points=2000):
+        self.dataset = None
+        self.df = None
+        # rendered files are shared by every session through the chart cache
+        self.chart_cache = chart_cache if chart_cache is not None else shared_chart_cache
+        # render-time reduction: drawing cost follows pixels, not rows
+        self.line_reduction = line_reduction  # "m4" or "lttb"
+        self.max_bars = max_bars
+        self.hist_bins = hist_bins
+        self.max_scatter = max_scatter  # above this, scatter becomes a density raster
+        self.max_points = max_points  # per trace sent to the browser in interactive mode
 
-        # Try converting non-date columns to numeric where possible
-        for col in df.columns:
-            if col != "Date" and not pd.api.types.is_datetime64_any_dtype(df[col]):
-                df[col] = pd.to_numeric(df[col], errors="coerce")
+    def receive_data(self, data):
+        """Store the shared Dataset (raw DataFrames are normalized once here)."""
+        self.dataset = Dataset.wrap(data)
+        self.df = self.dataset.df if self.dataset is not None else None
 
-        self.df = df
+    def render_options(self):
+        """Everything besides the data that changes the rendered pixels."""
+        return {
+            "line_reduction": self.line_reduction,
+            "max_bars": self.max_bars,
+            "hist_bins": self.hist_bins,
+            "max_scatter": self.max_scatter,
+            "size": FIG_WIDTH,
+            "dpi": DPI,
+        }
 
-    def generate_chart(self, output_path, chart_type="line"):
+    def generate_chart(self, output_path=None, chart_type="line"):
+        """
+        Render a chart of the numeric columns. Without `output_path` the
+        chart comes from the chart cache (rendered once per dataset, chart
+        type and render options) and its unique path is returned.
+        """
         if self.df is None:
             return {"success": False, "error": "Dataset not loaded inside ChartAgent."}
 
-        df = self.df.copy()
-
-        # detect numeric columns (excluding Date)
-        num_cols = df.select_dtypes(include=["number"]).columns.tolist()
+        # numeric columns were already coerced once by the Dataset
+        num_cols = self.dataset.numeric_cols
 
-        # If no numeric columns but there are object columns that look numeric, try to coerce again
         if len(num_cols) == 0:
-            for col in df.columns:
-                if col != "Date":
-                    coerced = pd.to_numeric(df[col], errors="coerce")
-                    if coerced.notna().sum() > 0:
-                        df[col] = coerced
-            num_cols = df.select_dtypes(include=["number"]).columns.tolist()
+            return {"success": False, "error": "No numeric columns found. Column dtypes:\n" + str(self.df.dtypes)}
 
-        if len(num_cols) == 0:
-            return {"success": False, "error": "No numeric columns found. Column dtypes:\n" + str(df.dtypes)}
+        chart_type = (chart_type or "line").lower()
+        if chart_type == "scatter" and len(num_cols) < 2:
+            return {"success": False, "error": "Scatter plot needs at least TWO numeric columns."}
 
-        has_date = "Date" in df.columns and pd.api.types.is_datetime64_any_dtype(df["Date"])
+        result = {"success": True, "chart_type": chart_type, "columns_plotted": num_cols}
+        try:
+            if output_path is not None:
+                self._render(output_path, chart_type, num_cols)
+                result.update(path=output_path, cached=False)
+            else:
+                key = self.chart_cache.make_key(self.dataset.fingerprint, chart_type, num_cols,
+                                                dict(self.render_options(), date_col=self.dataset.date_col))
+                path, cached = self.chart_cache.get_or_render(
+                    key, lambda path: self._render(path, chart_type, num_cols))
+                result.update(path=path, cached=cached)
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        return result
 
-        chart_type = (chart_type or "line").lower()
+    def generate_interactive(self, chart_type="line", x_range=None, max_points=None):
+        """
+        Interactive Plotly (WebGL) version of the chart.
 
-        # Reset any previous figure
-        plt.close("all")
-        plt.figure(figsize=(10, 5 + 1 * len(num_cols)))
+        The data is decimated server-side so every trace carries at most
+        about `max_points` points; panning and zooming then happen in the
+        browser. For line charts, pass the visible `x_range` = (start, end)
+        to resample just that window at full detail.
+        """
+        if self.df is None:
+            return {"success": False, "error": "Dataset not loaded inside ChartAgent."}
+        num_cols = self.dataset.numeric_cols
+        if len(num_cols) == 0:
+            return {"success": False, "error": "No numeric columns found. Column dtypes:\n" + str(self.df.dtypes)}
+        chart_type = (chart_type or "line").lower()
+        if chart_type == "scatter" and len(num_cols) < 2:
+            return {"success": False, "error": "Scatter plot needs at least TWO numeric columns."}
 
+        max_points = max_points or self.max_points
+        fig = go.Figure()
         try:
-            if chart_type == "line":
-                if has_date:
-                    for col in num_cols:
-                        plt.plot(df["Date"], df[col], marker='o', label=col)
-                    plt.xlabel("Date")
-                    plt.gcf().autofmt_xdate()
-                else:
-                    for col in num_cols:
-                        plt.plot(df.index, df[col], marker='o', label=col)
-                    plt.xlabel("Index")
-
-            elif chart_type == "bar":
-                if has_date:
-                    x = range(len(df))
-                    total = len(num_cols)
-                    width = 0.8 / max(total, 1)
-                    for i, col in enumerate(num_cols):
-                        plt.bar([xi + (i - total/2)*width for xi in x], df[col].fillna(0), width=width, label=col)
-                    plt.xticks(x, df["Date"].dt.strftime('%Y-%m-%d'), rotation=45, ha='right')
-                    plt.xlabel("Date")
-                else:
-                    df[num_cols].plot(kind="bar", figsize=(10, 5))
+            if chart_type == "bar":
+                labels, bars, xlabel = self._bar_data(num_cols)
+                for col, values in bars.items():
+                    fig.add_trace(go.Bar(x=list(labels), y=values, name=col))
+                fig.update_layout(xaxis_title=xlabel)
             elif chart_type == "hist":
-                df[num_cols[0]].dropna().plot(kind="hist", bins=20)
+                values = self.df[num_cols[0]].to_numpy(dtype=float, na_value=np.nan)
+                counts, edges = np.histogram(values[~np.isnan(values)], bins=self.hist_bins)
+                fig.add_trace(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges),
+                                     name=num_cols[0]))
             elif chart_type == "scatter":
-                if len(num_cols) < 2:
-                    return {"success": False, "error": "Scatter plot needs at least TWO numeric columns."}
-                plt.scatter(df[num_cols[0]], df[num_cols[1]], alpha=0.7)
-                plt.xlabel(num_cols[0]); plt.ylabel(num_cols[1])
+                x = self.df[num_cols[0]].to_numpy(dtype=float, na_value=np.nan)
+                y = self.df[num_cols[1]].to_numpy(dtype=float, na_value=np.nan)
+                if np.count_nonzero(~np.isnan(x) & ~np.isnan(y)) > max_points:
+                    grid, (x0, x1, y0, y1) = density(x, y, (100, 160))
+                    z = np.where(grid > 0, np.log10(np.maximum(grid, 1)), np.nan).astype(np.float32)
+                    fig.add_trace(go.Heatmap(z=z,
+                                             x0=x0, dx=(x1 - x0) / grid.shape[1],
+                                             y0=y0, dy=(y1 - y0) / grid.shape[0],
+                                             colorscale="Viridis", colorbar={"title": "log10 rows"}))
+                else:
+                    fig.add_trace(go.Scattergl(x=x, y=y, mode="markers", opacity=0.7,
+                                               name=f"{num_cols[0]} vs {num_cols[1]}"))
+                fig.update_layout(xaxis_title=num_cols[0], yaxis_title=num_cols[1])
             else:
-                # default multi-line
-                for col in num_cols:
-                    plt.plot(df.index, df[col], marker='o', label=col)
-
-            plt.legend()
-            plt.title("Generated Chart")
-            plt.tight_layout()
-            os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
-            plt.savefig(output_path, dpi=150, bbox_inches='tight')
-            plt.close()
-
-            return {"success": True, "chart_type": chart_type, "path": output_path, "columns_plotted": num_cols}
+                for col, xs, ys, band in self._line_data(num_cols, max_points, x_range):
+                    if band is not None:
+                        fig.add_trace(go.Scattergl(x=xs, y=band[0], mode="lines", line={"width": 0},
+                                                   showlegend=False, hoverinfo="skip", legendgroup=col))
+                        fig.add_trace(go.Scattergl(x=xs, y=band[1], mode="lines", line={"width": 0},
+                                                   fill="tonexty", opacity=0.2, showlegend=False,
+                                                   hoverinfo="skip", legendgroup=col))
+                    fig.add_trace(go.Scattergl(x=xs, y=ys, mode="lines", name=col, legendgroup=col))
+                fig.update_layout(xaxis_title=self.dataset.date_col or "Index")
         except Exception as e:
-            plt.close("all")
             return {"success": False, "error": str(e)}
+
+        # keep the user's zoom/legend state when a resampled figure replaces this one
+        fig.update_layout(title="Generated Chart", uirevision="chart", legend={"x": 0, "y": 1})
+        x, _ = self._x()
+        x = x[~pd.isna(x)]
+        return {
+            "success": True,
+            "chart_type": chart_type,
+            "figure": fig,
+            "columns_plotted": num_cols,
+            "rows": len(self.df),
+            "points": sum(len(t.x) for t in fig.data if getattr(t, "x", None) is not None),
+            "x_extent": (x.min(), x.max()) if len(x) else None,
+            "x_range": x_range,
+        }
+
+    def render_png(self, chart_type="line"):
+        """PNG bytes of the chart, rendered in memory (never cached on disk)."""
+        num_cols = self.dataset.numeric_cols
+        return figure_bytes(self._draw((chart_type or "line").lower(), num_cols), bbox_inches='tight')
+
+    def _render(self, output_path, chart_type, num_cols):
+        save_figure(self._draw(chart_type, num_cols), output_path, bbox_inches='tight')
+
+    def _draw(self, chart_type, num_cols):
+        """Build the chart on a standalone Figure (safe to call from any thread)."""
+        # The Dataset is shared with other agents: read it, never mutate it
+        df = self.df
+        date_col = self.dataset.date_col
+        has_date = date_col is not None and pd.api.types.is_datetime64_any_dtype(df[date_col])
+
+        fig = new_figure(figsize=(FIG_WIDTH, 5 + 1 * len(num_cols)))
+        ax = fig.add_subplot()
+        width_px = FIG_WIDTH * DPI
+
+        if chart_type == "line":
+            for col, xs, ys, band in self._line_data(num_cols, width_px):
+                line, = ax.plot(xs, ys, marker='o' if len(xs) <= 200 else None, label=col)
+                if band is not None:
+                    ax.fill_between(xs, band[0], band[1], color=line.get_color(), alpha=0.15, linewidth=0)
+            if has_date:
+                ax.set_xlabel(date_col)
+                fig.autofmt_xdate()
+            else:
+                ax.set_xlabel("Index")
+
+        elif chart_type == "bar":
+            labels, bars, xlabel = self._bar_data(num_cols)
+            pos = np.arange(len(labels))
+            width = 0.8 / max(len(bars), 1)
+            for i, (col, values) in enumerate(bars.items()):
+                ax.bar(pos + (i - len(bars) / 2) * width, values, width=width, label=col)
+            step = max(1, len(labels) // 20)
+            ax.set_xticks(pos[::step], labels[::step], rotation=45, ha='right')
+            if xlabel:
+                ax.set_xlabel(xlabel)
+        elif chart_type == "hist":
+            values = df[num_cols[0]].to_numpy(dtype=float, na_value=np.nan)
+            counts, edges = np.histogram(values[~np.isnan(values)], bins=self.hist_bins)
+            ax.stairs(counts, edges, fill=True, label=num_cols[0])
+        elif chart_type == "scatter":
+            x, y = df[num_cols[0]], df[num_cols[1]]
+            if len(df) > self.max_scatter:
+                # density raster: one cell per few pixels, whatever the row count
+                grid, extent = density(x.to_numpy(dtype=float, na_value=np.nan),
+                                       y.to_numpy(dtype=float, na_value=np.nan), (300, 500))
+                image = ax.imshow(np.ma.masked_equal(grid, 0), origin="lower", extent=extent, aspect="auto",
+                           norm=LogNorm(), cmap="viridis", interpolation="nearest")
+                fig.colorbar(image, ax=ax, label="rows")
+            else:
+                ax.scatter(x, y, alpha=0.7, label=f"{num_cols[0]} vs {num_cols[1]}")
+            ax.set_xlabel(num_cols[0]); ax.set_ylabel(num_cols[1])
+        else:
+            # default multi-line
+            for col in num_cols:
+                xs, ys = m4(df.index.to_numpy(), df[col].to_numpy(dtype=float, na_value=np.nan), width_px // 4)
+                ax.plot(xs, ys, marker='o' if len(xs) <= 200 else None, label=col)
+
+        if ax.get_legend_handles_labels()[0]:
+            ax.legend(loc="upper left")
+        ax.set_title("Generated Chart")
+        fig.tight_layout()
+        return fig
+
+    def _x(self, x_range=None):
+        """(x values, row mask) for line charts: the date column, else the row index."""
+        df = self.df
+        date_col = self.dataset.date_col
+        if date_col is not None and pd.api.types.is_datetime64_any_dtype(df[date_col]):
+            x, convert = df[date_col].to_numpy(), pd.Timestamp
+        else:
+            x, convert = df.index.to_numpy(), float
+        if x_range is None:
+            return x, None
+        lo, hi = x_range
+        mask = np.ones(len(x), dtype=bool)
+        if lo is not None:
+            mask &= x >= convert(lo).to_datetime64() if convert is pd.Timestamp else x >= lo
+        if hi is not None:
+            mask &= x <= convert(hi).to_datetime64() if convert is pd.Timestamp else x <= hi
+        return x[mask], mask
+
+    def _line_data(self, num_cols, n_points, x_range=None):
+        """
+        [(column, x, y, (min, max) band or None)] reduced to about `n_points`
+        per column, optionally restricted to `x_range` = (start, end).
+        """
+        x, mask = self._x(x_range)
+        has_date = np.issubdtype(x.dtype, np.datetime64)
+        out = []
+        if has_date and len(x) and pd.Series(x).duplicated().any():
+            # several rows per timestamp: mean per time bucket, min-max band
+            n_buckets = max(1, min(n_points // 2, len(np.unique(x))))
+            for col in num_cols:
+                y = self.df[col].to_numpy(dtype=float, na_value=np.nan)
+                xs, mean, lo, hi = time_buckets(x, y if mask is None else y[mask], n_buckets)
+                out.append((col, xs, mean, (lo, hi)))
+            return out
+        reduce = lttb if self.line_reduction == "lttb" else m4
+        budget = n_points if self.line_reduction == "lttb" else n_points // 4
+        for col in num_cols:
+            y = self.df[col].to_numpy(dtype=float, na_value=np.nan)
+            xs, ys = reduce(x, y if mask is None else y[mask], budget)
+            out.append((col, xs, ys, None))
+        return out
+
+    def _bar_data(self, num_cols):
+        """(bar labels, {column: bar heights}, x-axis label) with at most `max_bars` bars."""
+        df = self.df
+        date_col = self.dataset.date_col
+        if date_col is not None and pd.api.types.is_datetime64_any_dtype(df[date_col]):
+            # one bar per time bucket (sum), not per row
+            n_buckets = min(self.max_bars, df[date_col].nunique())
+            bars, labels = {}, None
+            for col in num_cols:
+                xs, sums, _, _ = time_buckets(df[date_col].to_numpy(),
+                                              df[col].to_numpy(dtype=float, na_value=np.nan),
+                                              n_buckets, agg="sum")
+                bars[col] = sums
+                labels = labels if labels is not None else pd.DatetimeIndex(xs).strftime('%Y-%m-%d')
+            return labels, bars, date_col
+        values, starts = position_bins(df[num_cols].to_numpy(dtype=float, na_value=np.nan), self.max_bars)
+        bars = {col: np.nan_to_num(values[:, i]) for i, col in enumerate(num_cols)}
+        xlabel = None
+        if len(values) < len(df):
+            xlabel = f"Row (mean of {int(np.ceil(len(df) / len(values)))} rows per bar)"
+        return df.index[starts], bars, xlabel
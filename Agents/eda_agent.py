@@ -1,9 +1,66 @@
+import pandas as pd
+
+from Core.correlation import correlate
+from Core.dataset import Dataset
+from Core.ingest import iter_chunks
+from Core.profiler import StreamingProfiler
+from Core.sampling import approximate_profile, reservoir_sample, rows_for_budget, stratified_sample
+
+
+def _is_missing(v):
+    return not isinstance(v, (tuple, list)) and pd.isna(v)
+
+
 class EDAAgent:
-    def __init__(self):
+    def __init__(self, chunksize=200_000, approx_budget_s=2.0, confidence=0.95, stream_sample_rows=1_000):
+        self.dataset = None
         self.data = None
+        self.source = None  # file too large for memory: profiled in chunks
+        self.chunksize = chunksize
+        self.approx_budget_s = approx_budget_s  # latency target for mode="approx"
+        self.confidence = confidence
+        self.stream_sample_rows = stream_sample_rows  # rows kept from a streamed file for "data"
+        self._corr = {}  # method -> CorrelationAccumulator for the current data
+
+    def receive_data(self, data):
+        self.dataset = Dataset.wrap(data)
+        self.data = self.dataset.df if self.dataset is not None else None
+        self._corr = {}
+
+    # ---------- Correlation ----------
 
-    def receive_data(self, df):
-        self.data = df
+    def _accumulator(self, method):
+        if method not in self._corr:
+            self._corr[method] = correlate(self.data, self.dataset.numeric_cols, method=method)
+        return self._corr[method]
+
+    def correlation(self, method="pearson", top_k=10, full=False):
+        """
+        Pearson/Spearman correlation of the numeric columns.
+
+        Returns the `top_k` strongest pairs; the full matrix only when
+        `full=True` (it is p x p, large for wide tables).
+        """
+        if self.data is None:
+            return {"error": "No data"}
+        acc = self._accumulator(method)
+        out = {"method": method, "top_pairs": acc.top_pairs(top_k)}
+        if full:
+            out["matrix"] = acc.matrix()
+        return out
+
+    def update_correlation(self, rows):
+        """Fold appended rows into the Pearson accumulator without a rescan."""
+        if "pearson" in self._corr:
+            self._corr["pearson"].update_frame(rows)
+        # ranks change with every new row; recompute Spearman on demand
+        self._corr.pop("spearman", None)
+
+    def receive_source(self, source, chunksize=None):
+        """Register a file path (or bytes) to be analyzed out-of-core."""
+        self.source = source
+        if chunksize:
+            self.chunksize = chunksize
 
     def handle(self, task):
         """Retry analyze() up to 3 times."""
@@ -16,47 +73,110 @@ class EDAAgent:
                 pass
         return {"error": "EDA failed after 3 attempts."}
 
-    def analyze(self):
+    def analyze(self, mode="exact", budget_s=None, strata=None):
+        """
+        EDA summary. `mode="approx"` profiles a sample sized to `budget_s`
+        (optionally stratified by `strata` columns) and reports confidence
+        intervals; ask again with mode="exact" for exact numbers.
+        """
         df = self.data
         if df is None:
+            if self.source is not None:
+                return self.analyze_stream()
             return {"error": "No data"}
 
+        if mode == "approx":
+            n = rows_for_budget(df, budget_s or self.approx_budget_s)
+            if n < len(df):
+                return self._analyze_sample(df, n, strata)
+
+        pairs = self._accumulator("pearson").top_pairs(3)
+        return self._summarize(self.dataset.profile(), df.head(10), df.shape[1], pairs)
+
+    def _analyze_sample(self, df, n, strata=None):
+        if strata:
+            sample = stratified_sample(df, strata, n)
+        else:
+            sample = df.sample(n=n, random_state=0)
+        prof = approximate_profile(sample, len(df), confidence=self.confidence)
+        pairs = correlate(sample, self.dataset.numeric_cols).top_pairs(3)
+        return self._summarize(prof, df.head(10), df.shape[1], pairs)
+
+    def analyze_stream(self, source=None, chunksize=None):
+        """
+        EDA over a file that does not fit in memory.
+
+        Walks the file in chunks and merges sketch statistics, so memory is
+        bounded by the chunk size, not the row count. "data" is a uniform
+        reservoir sample of the whole file rather than its first rows.
+        """
+        source = source if source is not None else self.source
+        if source is None:
+            return {"error": "No data"}
+
+        profiler = StreamingProfiler(track_correlation=True)
+
+        def profiled(chunks):
+            for chunk in chunks:
+                profiler.update(chunk)
+                yield chunk
+
+        # one pass: every chunk feeds both the profiler and the reservoir
+        sample = reservoir_sample(profiled(iter_chunks(source, chunksize or self.chunksize)),
+                                  self.stream_sample_rows)
+        prof = profiler.result()
+        if prof.n_rows == 0:
+            return {"error": "No rows found in source."}
+        pairs = profiler.correlation.top_pairs(3)
+        return self._summarize(prof, sample, len(prof.columns), pairs, streamed=True)
+
+    def _summarize(self, prof, df_sample, n_cols, pairs=(), streamed=False):
         # --------------------------
         # 1. Descriptive statistics
         # --------------------------
         try:
-            stats_dict = df.describe(include="all").fillna("").to_dict()
+            stats_dict = {
+                col: {k: ("" if _is_missing(v) else v) for k, v in col_stats.items()}
+                for col, col_stats in prof.describe().items()
+            }
         except:
             stats_dict = {}
 
         # --------------------------
-        # 2. Sample of dataset
-        # --------------------------
-        df_sample = df.head(10)
-
-        # --------------------------
-        # 3. Insights Summary
+        # 2. Insights Summary
         # --------------------------
         insights = []
 
         # Basic shape
-        insights.append(f"Dataset contains {df.shape[0]} rows and {df.shape[1]} columns.")
+        insights.append(f"Dataset contains {prof.n_rows} rows and {n_cols} columns.")
+        if streamed:
+            insights.append("Statistics computed out-of-core; quantiles and distinct counts are approximate.")
+        if prof.approximate:
+            insights.append(
+                f"Approximate EDA on a {prof.sample_rows}-row sample "
+                f"({prof.confidence:.0%} confidence intervals in stats). "
+                "Ask for 'exact EDA' for exact numbers."
+            )
 
         # Missing values
-        missing = df.isna().sum()
+        missing = pd.Series(prof.nulls())
         if missing.sum() > 0:
             top_missing = missing.sort_values(ascending=False).head(5)
             miss_txt = ", ".join([f"{idx}: {val}" for idx, val in top_missing.items()])
             insights.append(f"Columns with missing data: {miss_txt}")
 
         # Numeric columns: variance check
-        num_cols = df.select_dtypes(include="number").columns
-        if len(num_cols) > 0:
-            var_cols = df[num_cols].var().sort_values(ascending=False)
+        var_cols = prof.variances()
+        if len(var_cols) > 0:
             insights.append(f"Highest variance column: {var_cols.index[0]}")
 
+        # Correlation: strongest pairs
+        if pairs:
+            pair_txt = ", ".join([f"{a} ~ {b} ({r:+.2f})" for a, b, r in pairs])
+            insights.append(f"Strongest correlations: {pair_txt}")
+
         # Categorical columns
-        cat_cols = df.select_dtypes(include="object").columns
+        cat_cols = [col for col, p in prof.columns.items() if p["kind"] == "categorical"]
         if len(cat_cols) > 0:
             insights.append(f"Categorical columns detected: {', '.join(cat_cols[:5])}")
 
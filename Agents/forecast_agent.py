@@ -1,93 +1,149 @@
 #forecast_agent.py
+import hashlib
+import logging
+import math
+import pickle
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
 import pandas as pd
 import numpy as np
 from pmdarima import auto_arima
-from sklearn.linear_model import LinearRegression
+
+from Core.cache import LRUCache
+from Core.dataset import Dataset
+from Core.jobs import report_progress
+from Core.process_pool import PROCESS_WORKERS, get_pool, terminate
+from Core.timeseries import future_dates, regularize
+from ml import backtest, baselines
+
+log = logging.getLogger(__name__)
+
+
+def _series_hash(values):
+    return hashlib.blake2b(np.ascontiguousarray(values, dtype=float).tobytes(), digest_size=16).hexdigest()
+
+
+def _linear_forecast(values, days):
+    return baselines.linear_trend(np.asarray(values, dtype=float)[None, :], days)[0]
+
+
+def _fit_arima(values):
+    return auto_arima(values, seasonal=False, stepwise=True, trace=False,
+                      error_action="ignore", suppress_warnings=True)
+
+
+def _last_observed(values):
+    """Position of the last non-NaN value (series on a shared grid end at different times)."""
+    return len(values) - 1 - int(np.argmax(~np.isnan(values[::-1])))
+
+
+def _fit_series_batch(batch, days, min_points):
+    """Process-pool worker: forecast a batch of (key, values) series."""
+    out = []
+    for key, values in batch:
+        values = values[~np.isnan(values)]  # drop grid padding
+        if len(values) < min_points:
+            out.append((key, _linear_forecast(values, days), "linear"))
+            continue
+        try:
+            model = _fit_arima(values)
+            out.append((key, np.asarray(model.predict(days)), f"arima{model.order}"))
+        except Exception:
+            out.append((key, _linear_forecast(values, days), "linear"))
+    return out
 
 
 class ForecastAgent:
-    def __init__(self):
+    def __init__(self, model_cache=None):
+        self.dataset = None
         self.data = None
         self.target_col = None
         self.min_points_for_arima = 10  # threshold for ARIMA
+        self.max_arima_series = 200  # grouped mode: above this, use vectorized baselines
+        self.baseline_model = "holt"
+        # time grid: duplicate timestamps are combined with `aggregate`,
+        # gaps filled with `fill` (see Core/timeseries.py)
+        self.freq = None  # None = inferred from the date column
+        self.aggregate = "sum"
+        self.fill = "interpolate"
+        # fitted Auto-ARIMA models keyed by (dataset fingerprint, target column, freq)
+        self.models = model_cache if model_cache is not None else LRUCache(max_bytes=256 * 1024 ** 2)
+        # last fit per target: lets appended rows update instead of re-search
+        self._last_fit = {}
+        # backtest summaries keyed by (dataset fingerprint, target column, horizon)
+        self.benchmarks = {}
 
-    # ---------- Helpers ----------
-
-    def _split_single_text_column(self, df: pd.DataFrame) -> pd.DataFrame:
-        """
-        If the DataFrame has exactly one column and that column (or its name)
-        looks like a comma-separated header, split it into multiple columns.
-        """
-        if df.shape[1] != 1:
-            return df
-
-        col_name = df.columns[0]
-        first_vals = df.iloc[:, 0].astype(str)
-
-        # If header or first row contains commas, treat as CSV folded into one column
-        if ("," in col_name) or (first_vals.str.contains(",").any()):
-            if "," in col_name:
-                # header stored in column name
-                new_cols = [c.strip() for c in col_name.split(",")]
-                new_df = df.iloc[:, 0].str.split(",", expand=True)
-                new_df.columns = new_cols[: new_df.shape[1]]
-                # drop first row if it duplicates header
-                first_row = new_df.iloc[0].astype(str).tolist()
-                if all(a == b for a, b in zip(first_row, new_cols[: len(first_row)])):
-                    new_df = new_df.iloc[1:].reset_index(drop=True)
-                return new_df
-            else:
-                # header stored in first row
-                splitted = df.iloc[:, 0].str.split(",", expand=True)
-                header = splitted.iloc[0].astype(str).tolist()
-                new_df = splitted.iloc[1:].reset_index(drop=True)
-                new_df.columns = [h.strip() for h in header]
-                return new_df
-
-        return df
+    # ---------- Model cache ----------
 
-    # ---------- Public API ----------
+    def _arima_model(self, series, pool=None):
+        """
+        Return (model, how) for `series`; how is "cached", "updated" or "fitted".
 
-    def receive_data(self, df: pd.DataFrame):
-        """Normalize incoming dataset and choose a numeric target column."""
-        if df is None:
-            self.data = None
-            self.target_col = None
-            return
+        Changing the horizon reuses the cached fit; rows appended to a series
+        we already fitted are folded in with `model.update` instead of a new
+        stepwise order search. A new fit runs on `pool` (a process pool) when
+        one is given, so it doesn't hold the GIL of the calling process.
+        """
+        key = (self.dataset.fingerprint, self.target_col, getattr(series.index, "freqstr", None))
+        model = self.models.get(key)
+        if model is not None:
+            return model, "cached"
 
-        df = df.copy()
-        df.columns = df.columns.str.strip()
+        values = series.to_numpy(dtype=float)
+        last = self._last_fit.get(self.target_col)
+        how = "fitted"
+        if last and last["n"] < len(values) and _series_hash(values[: last["n"]]) == last["prefix"]:
+            # copy: the cached model still serves the shorter dataset
+            model = pickle.loads(pickle.dumps(last["model"]))
+            model.update(values[last["n"]:])
+            how = "updated"
+        elif pool is not None:
+            model = pool.submit(_fit_arima, values).result()
+        else:
+            model = _fit_arima(values)
 
-        # Fix “one big column” CSVs
-        df = self._split_single_text_column(df)
+        self.models.put(key, model, nbytes=len(pickle.dumps(model)))
+        self._last_fit[self.target_col] = {"n": len(values), "prefix": _series_hash(values), "model": model}
+        return model, how
 
-        # Parse date if present
-        if "Date" in df.columns:
-            df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    # ---------- Public API ----------
 
-        # Coerce all non-date columns to numeric where possible
-        for col in df.columns:
-            if col.lower() not in ["date", "time", "timestamp"] and not pd.api.types.is_datetime64_any_dtype(df[col]):
-                df[col] = pd.to_numeric(df[col], errors="coerce")
+    def receive_data(self, data):
+        """Store the shared Dataset and choose a numeric target column."""
+        self.dataset = Dataset.wrap(data)
+        if self.dataset is None:
+            self.data = None
+            self.target_col = None
+            return
 
-        self.data = df
+        # shared by reference; coercion already happened once in the Dataset
+        df = self.data = self.dataset.df
 
         # Choose numeric column with most non‑NaN values (good default target)
-        num_cols = df.select_dtypes(include="number").columns
+        num_cols = self.dataset.numeric_cols
         if len(num_cols):
-            self.target_col = max(num_cols, key=lambda c: df[c].notna().sum())
+            counts = df[num_cols].notna().sum()
+            self.target_col = counts.idxmax()
         else:
             self.target_col = None
 
-    def forecast(self, days: int = 7):
-        """Forecast next `days` points for the auto-selected target column."""
+    def forecast(self, days: int = 7, engine: str = "arima", pool=None):
+        """
+        Forecast next `days` points for the auto-selected target column.
+
+        `engine` is "arima", "baseline" (the vectorized `baseline_model`), a
+        model name from ml/baselines.py, or "auto" to use the engine that won
+        the rolling-origin backtest (see benchmark()). `pool` is an optional
+        process pool for the Auto-ARIMA fit.
+        """
         if self.data is None:
             return {"error": "No data loaded for forecasting."}
 
         if self.target_col is None:
             return {"error": "No numeric column found for forecasting."}
 
-        series = self.data[self.target_col].dropna()
+        series = self._prepare_series()
         n = len(series)
 
         if n == 0:
@@ -98,21 +154,23 @@ class ForecastAgent:
                 )
             }
 
+        if engine == "auto" and n >= self.min_points_for_arima:
+            engine = self.benchmark(days, series=series)["engine"]
+        if engine == "baseline":
+            engine = self.baseline_model
+        if engine not in ("arima", "auto"):
+            fc = baselines.forecast(series.to_numpy(dtype=float)[None, :], days, engine)[0]
+            insight = (
+                f"Forecast generated for next {days} {self._unit(series)} on '{self.target_col}' "
+                f"using the '{engine}' baseline."
+            )
+            return {"insights": insight, "forecast": self._forecast_frame(series, fc)}
+
         # ---- CASE 1: Short series → linear trend model ----
         if n < self.min_points_for_arima:
-            X = np.arange(n).reshape(-1, 1)
-            y = series.values.astype(float)
+            fc = _linear_forecast(series.values, days)
 
-            model = LinearRegression()
-            model.fit(X, y)
-
-            future_X = np.arange(n, n + days).reshape(-1, 1)
-            fc = model.predict(future_X)
-
-            df_fc = pd.DataFrame({
-                "day": range(n, n + days),
-                "forecast": fc,
-            })
+            df_fc = self._forecast_frame(series, fc)
 
             insight = (
                 f"Series has only {n} valid points; used linear trend regression on "
@@ -122,43 +180,286 @@ class ForecastAgent:
 
         # ---- CASE 2: Normal series → Auto‑ARIMA ----
         try:
-            model = auto_arima(
-                series,
-                seasonal=False,
-                stepwise=True,
-                trace=False,
-                error_action="ignore",
-                suppress_warnings=True,
-            )
+            model, how = self._arima_model(series, pool=pool)
 
-            fc = model.predict(days)
+            fc = np.asarray(model.predict(days))
 
-            df_fc = pd.DataFrame({
-                "day": range(n, n + days),
-                "forecast": fc,
-            })
+            df_fc = self._forecast_frame(series, fc)
 
             insight = (
-                f"Forecast generated for next {days} days on '{self.target_col}' "
-                f"using Auto-ARIMA (order: {model.order})."
+                f"Forecast generated for next {days} {self._unit(series)} on '{self.target_col}' "
+                f"using Auto-ARIMA (order: {model.order}, {how} model)."
             )
             return {"insights": insight, "forecast": df_fc}
 
         except Exception as e:
             # ---- CASE 3: ARIMA fails → fallback to linear trend ----
-            X = np.arange(n).reshape(-1, 1)
-            y = series.values.astype(float)
-            reg = LinearRegression().fit(X, y)
-            future_X = np.arange(n, n + days).reshape(-1, 1)
-            fc = reg.predict(future_X)
+            fc = _linear_forecast(series.values, days)
 
-            df_fc = pd.DataFrame({
-                "day": range(n, n + days),
-                "forecast": fc,
-            })
+            df_fc = self._forecast_frame(series, fc)
 
             insight = (
                 f"Auto-ARIMA failed ({e}); fell back to linear trend regression "
                 f"for the next {days} days on '{self.target_col}'."
             )
             return {"insights": insight, "forecast": df_fc}
+
+    def benchmark(self, days: int = 7, engines=None, folds: int = 5, series=None,
+                  budget_s=None):
+        """
+        Rolling-origin backtest of the forecast engines on the target series.
+
+        Returns {"insights", "summary", "engine"}: per-engine mean MAE, MAPE,
+        sMAPE, fit seconds and peak MB, and the engine picked by
+        ml.backtest.choose_engine. Results are kept per dataset and horizon.
+        """
+        if self.data is None or self.target_col is None:
+            return {"error": "No data loaded for forecasting."}
+        key = (self.dataset.fingerprint, self.target_col, days)
+        if key in self.benchmarks and engines is None and budget_s is None:
+            return self.benchmarks[key]
+
+        series = self._prepare_series() if series is None else series
+        results = backtest.backtest(series.to_numpy(dtype=float), h=days, engines=engines,
+                                    folds=folds, min_train=self.min_points_for_arima)
+        summary = backtest.summarize(results)
+        if summary.empty:
+            return {"error": f"Series '{self.target_col}' is too short to backtest {days} steps ahead."}
+        engine = backtest.choose_engine(summary, budget_s=budget_s)
+
+        best = summary.loc[engine]
+        insight = (
+            f"Backtested {len(summary)} engines over {int(best['folds'])} folds on "
+            f"'{self.target_col}'. Selected '{engine}' (sMAPE {best['smape']:.1f}%, "
+            f"{best['seconds'] * 1000:.0f} ms per fit)."
+        )
+        out = {"insights": insight, "summary": summary, "engine": engine}
+        if engines is None and budget_s is None:
+            self.benchmarks[key] = out
+        return out
+
+    # ---------- Time index ----------
+
+    def _prepare_series(self):
+        """
+        Target series on a regular time grid when the data has a date column
+        (duplicate timestamps aggregated, gaps filled); otherwise the non-null
+        values in row order.
+        """
+        date_col = self.dataset.date_col
+        if not date_col:
+            return self.data[self.target_col].dropna()
+        wide, freq = regularize(self.data, date_col, self.target_col, freq=self.freq,
+                                agg=self.aggregate, fill=self.fill)
+        if wide.empty:
+            return pd.Series(dtype=float)
+        series = wide.iloc[0].dropna()
+        series.index = pd.DatetimeIndex(series.index, freq=freq)
+        return series
+
+    @staticmethod
+    def _unit(series):
+        freq = getattr(series.index, "freqstr", None)
+        return "days" if freq in (None, "D") else f"periods ({freq})"
+
+    @staticmethod
+    def _forecast_frame(series, fc):
+        """Label forecasts with real future dates when the series is dated."""
+        freq = getattr(series.index, "freqstr", None)
+        if freq is None:
+            n = len(series)
+            return pd.DataFrame({"day": range(n, n + len(fc)), "forecast": fc})
+        return pd.DataFrame({"date": future_dates(series.index[-1], freq, len(fc)), "forecast": fc})
+
+    # ---------- Grouped forecasting ----------
+
+    def group_keys(self, max_cardinality=1000):
+        """Default grouping: low-cardinality categorical columns (e.g. Product, Region)."""
+        if self.dataset is None:
+            return []
+        df = self.data
+        return [c for c in self.dataset.categorical_cols
+                if 1 < df[c].nunique(dropna=True) <= max_cardinality]
+
+    def count_series(self, keys=None):
+        """Number of groups forecast_groups() would fit."""
+        keys = list(keys) if keys else self.group_keys()
+        if self.data is None or not keys:
+            return 1
+        return int(self.data.groupby(keys, observed=True).ngroups)
+
+    def forecast_groups(self, days: int = 7, keys=None, target=None, engine="auto",
+                        max_workers=None, timeout=30.0, tasks_per_worker=4):
+        """
+        Forecast one series per group of `keys` (default: group_keys()).
+
+        engine="baseline" forecasts every series at once with a vectorized
+        closed-form model (ml/baselines.py); "arima" fits Auto-ARIMA per
+        series; "auto" picks baseline above `max_arima_series` series.
+
+        Series are fitted in batches on the shared process pool
+        (Core/process_pool.py), at most `max_workers` at a time (capped at
+        the pool's size); each batch gets `timeout` seconds per series it
+        holds, counted from when it starts, and series whose batch times out
+        fall back to a linear trend. Returns {"insights", "forecast"}
+        where "forecast" is a tidy frame: keys..., [date,] step, forecast, model
+        (date = real future periods when the data has a date column).
+        """
+        if self.data is None:
+            return {"error": "No data loaded for forecasting."}
+        target = target or self.target_col
+        if target is None:
+            return {"error": "No numeric column found for forecasting."}
+        keys = list(keys) if keys else self.group_keys()
+        if not keys:
+            return self.forecast(days)
+
+        series, dates = self._group_series(keys, target)
+        if not series:
+            return {"error": f"No non-empty '{target}' series for groups {keys}."}
+
+        if engine == "auto":
+            engine = "baseline" if len(series) > self.max_arima_series else "arima"
+        if engine == "baseline":
+            return self._baseline_groups(series, keys, target, days, dates)
+
+        workers = min(max_workers or PROCESS_WORKERS, PROCESS_WORKERS)
+        n_tasks = min(len(series), workers * tasks_per_worker)
+        size = math.ceil(len(series) / n_tasks)
+        batches = [series[i:i + size] for i in range(0, len(series), size)]
+
+        results = []
+        if workers == 1 or len(batches) == 1:
+            for i, batch in enumerate(batches):
+                report_progress(i / len(batches), f"Fitting batch {i + 1}/{len(batches)}")
+                results.extend(_fit_series_batch(batch, days, self.min_points_for_arima))
+        else:
+            results = self._fit_batches_in_pool(batches, days, workers, timeout)
+        rows = []
+        for key, fc, model_name in results:
+            for step, value in enumerate(fc, start=1):
+                rows.append((*key, step, float(value), model_name))
+        df_fc = pd.DataFrame(rows, columns=keys + ["step", "forecast", "model"])
+        if dates is not None:
+            last = {key: _last_observed(values) for key, values in series}
+            df_fc = self._label_steps(df_fc, dates, days,
+                                      np.array([last[key] for key, fc, _ in results for _ in fc]))
+
+        insight = (
+            f"Forecast generated for next {days} days on '{target}' for "
+            f"{len(series)} series grouped by {', '.join(keys)}."
+        )
+        return {"insights": insight, "forecast": df_fc}
+
+    def _fit_batches_in_pool(self, batches, days, workers, timeout, poll_s=0.5):
+        """
+        Fit `batches` on the shared process pool with at most `workers` in
+        flight. Each batch must finish within `timeout` seconds per series
+        from when the pool starts running it (not from submission, since
+        other sessions' tasks may be queued ahead). A late batch falls back
+        to a linear trend and the pool is recycled, killing the hung worker;
+        the batches still to run are resubmitted to the fresh pool.
+        """
+        results = []
+        todo = list(batches)
+        running = {}  # future -> (batch, deadline; None until the pool starts it)
+        pool = get_pool()
+        while todo or running:
+            while todo and len(running) < workers:
+                batch = todo.pop(0)
+                fut = pool.submit(_fit_series_batch, batch, days, self.min_points_for_arima)
+                running[fut] = (batch, None)
+
+            now = time.monotonic()
+            for fut, (batch, deadline) in running.items():
+                if deadline is None and fut.running():
+                    running[fut] = (batch, now + timeout * len(batch))
+            deadlines = [d for _, d in running.values() if d is not None]
+            wake = min(deadlines) - now if len(deadlines) == len(running) else poll_s
+            done, _ = wait(running, timeout=max(0.0, min(wake, poll_s)), return_when=FIRST_COMPLETED)
+            for fut in done:
+                batch, _ = running.pop(fut)
+                error = fut.exception()
+                if error is None:
+                    results.extend(fut.result())
+                else:
+                    log.error("Forecast batch of %d series failed: %r", len(batch), error)
+                    results.extend((k, _linear_forecast(v, days), "linear (error)") for k, v in batch)
+
+            now = time.monotonic()
+            late = [fut for fut, (_, deadline) in running.items() if deadline is not None and deadline <= now]
+            if late:
+                for fut in late:
+                    batch, _ = running.pop(fut)
+                    results.extend((k, _linear_forecast(v, days), "linear (timeout)") for k, v in batch)
+                # a hung worker keeps its process: recycle the pool, resubmit the rest
+                terminate(pool)
+                todo = [batch for batch, _ in running.values()] + todo
+                running = {}
+                pool = get_pool()
+
+            done_batches = len(batches) - len(todo) - len(running)
+            report_progress(done_batches / len(batches), f"Fitted {done_batches}/{len(batches)} batches")
+        return results
+
+    def _group_series(self, keys, target):
+        """
+        [(key tuple, values)] per group plus the grid dates (None when the
+        data has no date column, in which case rows are taken in order).
+        """
+        date_col = self.dataset.date_col
+        if date_col:
+            wide, freq = regularize(self.data, date_col, target, keys=keys, freq=self.freq,
+                                    agg=self.aggregate, fill=self.fill)
+            if wide.empty:
+                return [], None
+            index = wide.index if isinstance(wide.index, pd.MultiIndex) else [(k,) for k in wide.index]
+            Y = wide.to_numpy()
+            series = [(tuple(k), row) for k, row in zip(index, Y) if (~np.isnan(row)).any()]
+            # series values keep the grid's NaN padding; callers trim as needed
+            return series, pd.DatetimeIndex(wide.columns, freq=freq)
+
+        frame = self.data[keys + [target]].dropna(subset=[target])
+        series = [
+            (key if isinstance(key, tuple) else (key,), g[target].to_numpy(dtype=float))
+            for key, g in frame.groupby(keys, observed=True, sort=True)
+        ]
+        return [(k, v) for k, v in series if len(v) > 0], None
+
+    @staticmethod
+    def _label_steps(df_fc, dates, days, last):
+        """
+        Date each step from its own series' last observation: `last` holds,
+        per row, that observation's position on the grid `dates`.
+        """
+        if dates is None:
+            return df_fc
+        grid = dates.append(future_dates(dates[-1], dates.freqstr, days))
+        df_fc.insert(df_fc.columns.get_loc("step"), "date", grid[last + df_fc["step"].to_numpy()])
+        return df_fc
+
+    def _baseline_groups(self, series, keys, target, days, dates=None, model=None):
+        model = model or self.baseline_model
+        if dates is not None:
+            # already aligned on the shared time grid
+            Y = np.vstack([v for _, v in series])
+        else:
+            Y = baselines.align_series([v for _, v in series])
+        fc = baselines.forecast(Y, days, model)
+
+        n = len(series)
+        key_cols = list(zip(*[k for k, _ in series]))
+        df_fc = pd.DataFrame({col: np.repeat(np.array(vals, dtype=object), days)
+                              for col, vals in zip(keys, key_cols)})
+        df_fc["step"] = np.tile(np.arange(1, days + 1), n)
+        df_fc["forecast"] = fc.ravel()
+        df_fc["model"] = model
+        if dates is not None:
+            df_fc = self._label_steps(df_fc, dates, days,
+                                      np.repeat([_last_observed(v) for _, v in series], days))
+
+        insight = (
+            f"Forecast generated for next {days} days on '{target}' for {n} series "
+            f"grouped by {', '.join(keys)} using the vectorized '{model}' baseline."
+        )
+        return {"insights": insight, "forecast": df_fc}
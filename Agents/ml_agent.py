@@ -2,26 +2,32 @@ import pandas as pd
 import joblib
 from ml.trainer import ModelTrainer
 from ml.explain import ShapExplainer
+from Core.dataset import Dataset
+from Core.shared_memory import publish
 
 class MLTrainerAgent:
     def __init__(self):
+        self.dataset = None
         self.df = None
         self.target = None
         self.model = None
         self.path = None
         self.explainer = None
 
-    def receive_data(self, df):
-        self.df = df
+    def receive_data(self, data):
+        self.dataset = Dataset.wrap(data)
+        self.df = self.dataset.df if self.dataset is not None else None
 
     def set_target(self, target):
         if target not in self.df.columns:
             raise ValueError(f"Target '{target}' not found.")
         self.target = target
 
-    def quick_compare(self):
+    def quick_compare(self, pool=None):
+        """Compare models; with a process pool, workers read the data from shared memory."""
         trainer = ModelTrainer(self.df, self.target)
-        return trainer.quick_compare()
+        handle = publish(self.dataset) if pool is not None else None
+        return trainer.quick_compare(pool=pool, handle=handle)
 
     def train(self, model_type="rf"):
         trainer = ModelTrainer(self.df, self.target)
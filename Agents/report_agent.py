@@ -1,25 +1,176 @@
-from pptx import Presentation
-from pptx.util import Inches
+from functools import lru_cache
+import io
 import os
+import uuid
+
+import numpy as np
+import pandas as pd
+import pptx
+from pptx import Presentation
+from pptx.opc.packuri import PackURI
+from pptx.parts.image import Image, ImagePart
+from pptx.util import Inches, Pt
+
+from Core.dataset import Dataset
+from Core.downsample import m4, time_buckets
+from Core.render import figure_bytes, new_figure, render_many
+
+DEFAULT_TEMPLATE = os.path.join(os.path.dirname(pptx.__file__), "templates", "default.pptx")
+
+
+@lru_cache(maxsize=4)
+def _template_bytes(path):
+    """Template file read once per process; each deck parses its own copy."""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class _ImageIndex:
+    """
+    sha1 -> ImagePart for one deck. python-pptx looks up duplicates and the
+    next free image name by walking every relationship in the package, which
+    makes adding N pictures O(N^2); this keeps both lookups O(1).
+
+    It stands in for python-pptx's private `Package._image_parts`, so the
+    version is pinned in requirements.txt and tests/test_report_agent.py
+    fails if those internals move.
+    """
+
+    def __init__(self, package):
+        self._package = package
+        parts = [p for p in package._image_parts if hasattr(p, "sha1")]
+        self._by_sha1 = {p.sha1: p for p in parts}
+        self._next = max((p.partname.idx or 0 for p in parts), default=0) + 1
+
+    def __iter__(self):
+        return iter(list(self._by_sha1.values()))
+
+    def get_or_add_image_part(self, image_file):
+        image = Image.from_file(image_file)
+        part = self._by_sha1.get(image.sha1)
+        if part is None:
+            partname = PackURI(f"/ppt/media/image{self._next}.{image.ext}")
+            self._next += 1
+            part = ImagePart(partname, image.content_type, self._package, image.blob, image.filename)
+            self._by_sha1[image.sha1] = part
+        return part
+
+
+def _open_deck(template):
+    prs = Presentation(io.BytesIO(_template_bytes(template)))
+    package = prs.part.package
+    # only where python-pptx still resolves images through the lazy
+    # `_image_parts` attribute; otherwise keep its (slower) default lookup
+    if "_image_parts" in vars(type(package)) and hasattr(package, "_image_parts"):
+        try:
+            # replaces python-pptx's lazily created _ImageParts for this deck only
+            package.__dict__["_image_parts"] = _ImageIndex(package)
+        except AttributeError:
+            pass
+    return prs
+
+
+def _image_source(image):
+    """add_picture() input for a path, raw bytes or a file-like buffer."""
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return io.BytesIO(bytes(image))
+    if hasattr(image, "seek"):
+        image.seek(0)
+    return image
+
 
 class ReportAgent:
-    def __init__(self):
+    def __init__(self, template=None, max_groups=200, render_workers=4, render_batch=16):
         self.simple = ""
         self.eda = ""
         self.forecast = ""
+        self.dataset = None
         self.df = None
+        self.template = template or DEFAULT_TEMPLATE
+        self.max_groups = max_groups
+        # charts are rendered `render_batch` at a time, so at most that many
+        # PNG buffers wait to be placed in the deck
+        self.render_workers = render_workers
+        self.render_batch = render_batch
 
-    def receive_data(self, df):
+    def receive_data(self, data):
         """Some agents require data; report agent stores it quietly."""
-        self.df = df
+        self.dataset = Dataset.wrap(data)
+        self.df = self.dataset.df if self.dataset is not None else None
 
     def collect(self, simple, eda, forecast):
         self.simple = simple or ""
         self.eda = eda or ""
         self.forecast = forecast or ""
 
-    def generate(self, filename, chart_path=None):
-        prs = Presentation()
+    def group_sections(self, keys, target=None, max_groups=None):
+        """
+        One report section per group of `keys` (e.g. product x region), the
+        largest groups by total `target` first. Each section is a dict with
+        a title, a summary table and a `chart` callable returning PNG bytes;
+        charts are only drawn when generate() gets to them.
+        """
+        if self.df is None or not keys:
+            return []
+        df = self.df
+        target = target or (self.dataset.numeric_cols[0] if self.dataset.numeric_cols else None)
+        if target is None:
+            return []
+        max_groups = max_groups or self.max_groups
+        date_col = self.dataset.date_col
+        has_date = date_col is not None and pd.api.types.is_datetime64_any_dtype(df[date_col])
+
+        values = df[target].to_numpy(dtype=float, na_value=np.nan)
+        x = df[date_col].to_numpy() if has_date else np.arange(len(df))
+        groups = df.groupby(keys, observed=True, sort=False).indices
+        totals = {g: np.nansum(values[rows]) for g, rows in groups.items()}
+        top = sorted(groups, key=lambda g: -totals[g])[:max_groups]
+
+        sections = []
+        for g in top:
+            rows = groups[g]
+            label = " / ".join(map(str, g if isinstance(g, tuple) else (g,)))
+            y = values[rows]
+            table = {
+                "Rows": f"{len(rows):,}",
+                f"Total {target}": f"{np.nansum(y):,.2f}",
+                f"Mean {target}": f"{np.nanmean(y):,.2f}" if np.isfinite(y).any() else "-",
+                f"Min {target}": f"{np.nanmin(y):,.2f}" if np.isfinite(y).any() else "-",
+                f"Max {target}": f"{np.nanmax(y):,.2f}" if np.isfinite(y).any() else "-",
+            }
+            sections.append({
+                "title": label,
+                "table": table,
+                "chart": (lambda xs=x[rows], ys=y, title=f"{target} - {label}":
+                          self._group_chart(xs, ys, title, date_col if has_date else "Row")),
+            })
+        return sections
+
+    @staticmethod
+    def _group_chart(x, y, title, xlabel):
+        fig = new_figure(figsize=(9, 3.6))
+        ax = fig.add_subplot()
+        if np.issubdtype(x.dtype, np.datetime64) and len(x) and len(np.unique(x)) < len(x):
+            x, y, _, _ = time_buckets(x, y, 300, agg="sum")
+        else:
+            x, y = m4(x, y, 300)
+        ax.plot(x, y, linewidth=1.2)
+        ax.set_title(title)
+        ax.set_xlabel(xlabel)
+        fig.autofmt_xdate()
+        # fixed margins: tight_layout costs more than the plot at this size
+        fig.subplots_adjust(left=0.08, right=0.98, top=0.9, bottom=0.2)
+        return figure_bytes(fig, dpi=100)
+
+    def generate(self, filename, chart_path=None, sections=None):
+        """
+        Write the deck to `filename`.
+
+        `chart_path` is the overview chart: a file path, PNG bytes or a
+        file-like buffer. `sections` (see group_sections()) add one slide
+        per group; their chart callables are rendered in parallel batches.
+        """
+        prs = _open_deck(self.template)
 
         # --- Title Slide ---
         slide = prs.slides.add_slide(prs.slide_layouts[0])
@@ -27,7 +178,7 @@ class ReportAgent:
         slide.placeholders[1].text = "Generated by the AI Multi-Agent System"
 
         # --- Chart Slide (only if exists) ---
-        if chart_path and os.path.exists(chart_path):
+        if chart_path is not None and (not isinstance(chart_path, str) or os.path.exists(chart_path)):
             slide = prs.slides.add_slide(prs.slide_layouts[5])
             slide.shapes.title.text = "Generated Chart"
 
@@ -46,7 +197,7 @@ class ReportAgent:
             # Add picture filling available box
             left = margin_h
             top = margin_top
-            slide.shapes.add_picture(chart_path, left, top, width=pic_width, height=pic_height)
+            slide.shapes.add_picture(_image_source(chart_path), left, top, width=pic_width, height=pic_height)
 
         # --- EDA Slide ---
         slide = prs.slides.add_slide(prs.slide_layouts[1])
@@ -60,5 +211,48 @@ class ReportAgent:
         body = slide.placeholders[1].text_frame
         body.text = self.forecast
 
-        prs.save(filename)
+        # --- One slide per group ---
+        sections = list(sections or [])
+        for start in range(0, len(sections), self.render_batch):
+            batch = sections[start:start + self.render_batch]
+            images = render_many([s["chart"] if callable(s.get("chart")) else (lambda s=s: s.get("chart"))
+                                  for s in batch], max_workers=self.render_workers)
+            for section, image in zip(batch, images):
+                self._group_slide(prs, section, None if isinstance(image, Exception) else image)
+            del images  # placed in the deck; drop the batch's buffers
+
+        tmp = f"{filename}.{uuid.uuid4().hex}.tmp"
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+        prs.save(tmp)
+        os.replace(tmp, filename)
         return filename
+
+    @staticmethod
+    def _group_slide(prs, section, image):
+        slide = prs.slides.add_slide(prs.slide_layouts[5])
+        slide.shapes.title.text = section.get("title", "")
+        margin = Inches(0.5)
+        width = prs.slide_width - 2 * margin
+        top = Inches(1.4)
+        if image is not None:
+            pic = slide.shapes.add_picture(_image_source(image), margin, top, width=width)
+            top = pic.top + pic.height + Inches(0.1)
+
+        table = section.get("table")
+        if table is None:
+            return
+        if isinstance(table, pd.DataFrame):
+            header, rows = [str(c) for c in table.columns], table.astype(str).values.tolist()
+        else:
+            header, rows = list(map(str, table)), [[str(v) for v in table.values()]]
+        height = max(prs.slide_height - top - margin, Inches(0.6))
+        shape = slide.shapes.add_table(len(rows) + 1, len(header), margin, top, width, height)
+        grid = shape.table
+        for j, name in enumerate(header):
+            grid.cell(0, j).text = name
+        for i, row in enumerate(rows, start=1):
+            for j, value in enumerate(row):
+                grid.cell(i, j).text = value
+        for cell in (grid.cell(i, j) for i in range(len(rows) + 1) for j in range(len(header))):
+            for paragraph in cell.text_frame.paragraphs:
+                paragraph.font.size = Pt(11)
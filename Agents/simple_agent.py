@@ -1,29 +1,46 @@
 import pandas as pd
 
+from Core.dataset import Dataset
+from Core.duplicates import duplicate_mask, find_duplicates
+
 class SimpleDataAgent:
     def __init__(self):
+        self.dataset = None
         self.data = None
 
-    def receive_data(self, df):
-        self.data = df
+    def receive_data(self, data):
+        self.dataset = Dataset.wrap(data)
+        self.data = self.dataset.df if self.dataset is not None else None
 
-    def analyze(self):
+    def analyze(self, include_data=False, chunksize=None):
+        """
+        Quick overview. Duplicates are counted by row hashing, so no
+        de-duplicated copy is built unless `include_data=True`.
+        """
         df = self.data
 
+        dups = find_duplicates(df, chunksize=chunksize)
         original_rows = len(df)
-        df = df.drop_duplicates()
-        cleaned_rows = len(df)
+        cleaned_rows = original_rows - dups["count"]
 
-        missing = df.isna().sum().to_dict()
-        stats = df.describe(include="all").to_dict()
+        # one shared profiling pass instead of isna() + describe()
+        prof = self.dataset.profile()
+        missing = prof.nulls()
+        stats = prof.describe()
 
         insights = f"""
         --- SIMPLE DATA INSIGHTS ---
         Rows after cleaning: {cleaned_rows}
-        Removed duplicates: {original_rows-cleaned_rows}
+        Removed duplicates: {dups["count"]}
+        Duplicate row sample (positions): {dups["sample_index"]}
         Columns: {list(df.columns)}
         Missing values: {missing}
         ----------------------------
         """
 
-        return {"data": df, "stats": stats, "insights": insights}
+        if include_data:
+            data = df[~duplicate_mask(df)] if dups["count"] else df
+        else:
+            data = df.head(10)
+
+        return {"data": data, "stats": stats, "insights": insights, "duplicates": dups}
@@ -0,0 +1,160 @@
+# cache.py
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def estimate_nbytes(obj):
+    """Rough in-memory size of a cached value."""
+    if obj is None:
+        return 0
+    nbytes = getattr(obj, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        usage = obj.memory_usage(index=True, deep=False)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return len(obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimate_nbytes(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(estimate_nbytes(v) for v in obj)
+    return sys.getsizeof(obj)
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache bounded by total bytes (and optionally entry age).
+
+    Values larger than `max_bytes` are never stored. Entries can be pinned
+    with acquire()/release() reference counts while something (e.g. a user
+    session) still uses them; pinned entries are never evicted, so the
+    cache may sit above `max_bytes` until they are released.
+
+    `on_evict(key, value)`, if given, is called (under the cache lock) for
+    every entry that leaves the cache other than by being overwritten.
+    """
+
+    def __init__(self, max_bytes=512 * 1024 ** 2, ttl=None, on_evict=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._items = OrderedDict()  # key -> (value, nbytes, stored_at)
+        self._bytes = 0
+        self._refs = {}  # key -> reference count of pinned entries
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            if self.ttl is not None and time.monotonic() - item[2] > self.ttl and key not in self._refs:
+                self._drop(key)
+                self.misses += 1
+                return default
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, value, nbytes=None):
+        if nbytes is None:
+            nbytes = estimate_nbytes(value)
+        with self._lock:
+            if key in self._items:
+                self._drop(key, notify=False)
+            if nbytes > self.max_bytes:
+                return False
+            self._items[key] = (value, nbytes, time.monotonic())
+            self._bytes += nbytes
+            self._evict()
+            return True
+
+    def _evict(self):
+        if self._bytes <= self.max_bytes:
+            return
+        for key in [k for k in self._items if k not in self._refs]:
+            self._drop(key)
+            self.evictions += 1
+            if self._bytes <= self.max_bytes:
+                return
+
+    def acquire(self, key):
+        """Pin `key` (one reference) and return its value, or None if absent."""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            self._refs[key] = self._refs.get(key, 0) + 1
+            self._items.move_to_end(key)
+            return item[0]
+
+    def release(self, key):
+        """Drop one reference; returns how many remain."""
+        with self._lock:
+            refs = self._refs.get(key, 0) - 1
+            if refs > 0:
+                self._refs[key] = refs
+                return refs
+            self._refs.pop(key, None)
+            self._evict()
+            return 0
+
+    def refcount(self, key):
+        with self._lock:
+            return self._refs.get(key, 0)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._items:
+                return default
+            value = self._items[key][0]
+            self._drop(key)
+            return value
+
+    def keys(self):
+        with self._lock:
+            return list(self._items)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._items):
+                self._drop(key)
+
+    def _drop(self, key, notify=True):
+        value, nbytes, _ = self._items.pop(key)
+        self._bytes -= nbytes
+        self._refs.pop(key, None)
+        if notify and self.on_evict is not None:
+            self.on_evict(key, value)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._items),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "pinned": len(self._refs),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
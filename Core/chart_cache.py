@@ -0,0 +1,136 @@
+# chart_cache.py
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+from Core.cache import LRUCache
+
+CHART_DIR = os.getenv("INSIGHTOPS_CHART_DIR", os.path.join("assets", "charts"))
+CHART_CACHE_BYTES = int(os.getenv("INSIGHTOPS_CHART_CACHE_MB", "64")) * 1024 ** 2
+
+
+class ChartCache:
+    """
+    Content-addressed cache of rendered chart files.
+
+    A chart is identified by the dataset fingerprint, chart type, plotted
+    columns and render options; its file is named after the hash of that
+    key, so identical requests from any session share one file and
+    different requests never write to the same path. Files are written to
+    a temp name and moved into place, and concurrent requests for the same
+    chart render it once. The directory is bounded by `max_bytes`: evicted
+    entries have their file deleted; a chart larger than the whole budget
+    is still served, but only the most recent such file is kept. Files left
+    by a previous run are adopted on start-up (oldest first in LRU order).
+    """
+
+    def __init__(self, directory=CHART_DIR, max_bytes=CHART_CACHE_BYTES):
+        self.directory = directory
+        self._files = LRUCache(max_bytes=max_bytes, on_evict=self._remove)
+        self._inflight = {}  # key -> lock held while the chart renders
+        self._lock = threading.Lock()
+        self._oversized = None  # path of the last chart too big to cache
+        self.hits = 0
+        self.misses = 0
+        self.renders = 0
+        self.render_seconds = 0.0
+        if os.path.isdir(directory):
+            self._adopt()
+
+    @staticmethod
+    def make_key(fingerprint, chart_type, columns, options=None):
+        payload = json.dumps([fingerprint, chart_type, list(columns), options or {}],
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+    def path_for(self, key, ext="png"):
+        return os.path.join(self.directory, f"{key}.{ext}")
+
+    def get_or_render(self, key, render, ext="png"):
+        """
+        Path of the chart for `key`, calling `render(path)` to draw it on a
+        miss. Returns (path, cached). Nothing is cached if `render` raises.
+        """
+        path = self._files.get(key)
+        if path is not None and os.path.exists(path):
+            return self._count(path, hit=True)
+
+        with self._lock:
+            gate = self._inflight.setdefault(key, threading.Lock())
+        with gate:
+            # another session may have rendered it while we waited
+            if key in self._files and os.path.exists(self.path_for(key, ext)):
+                return self._count(self.path_for(key, ext), hit=True)
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                path = self.path_for(key, ext)
+                tmp = os.path.join(self.directory, f".{key}.{uuid.uuid4().hex}.{ext}")
+                start = time.perf_counter()
+                try:
+                    render(tmp)
+                    os.replace(tmp, path)
+                finally:
+                    if os.path.exists(tmp):
+                        os.remove(tmp)
+                with self._lock:
+                    self.renders += 1
+                    self.render_seconds += time.perf_counter() - start
+                if not self._files.put(key, path, nbytes=os.path.getsize(path)):
+                    with self._lock:
+                        previous, self._oversized = self._oversized, path
+                    if previous not in (None, path):
+                        self._remove(None, previous)
+                return self._count(path, hit=False)
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+
+    def _count(self, path, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return path, hit
+
+    def invalidate(self, key=None):
+        """Drop (and delete) one chart, or all of them when `key` is None."""
+        if key is None:
+            self._files.clear()
+        else:
+            self._files.pop(key)
+
+    def _remove(self, key, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _adopt(self):
+        found = []
+        for entry in os.scandir(self.directory):
+            name, _, ext = entry.name.partition(".")
+            if entry.is_file() and name and ext:
+                found.append((entry.stat().st_mtime, name, entry.path, entry.stat().st_size))
+            elif entry.is_file() and entry.name.startswith("."):
+                self._remove(None, entry.path)  # temp file from an interrupted render
+        for _, key, path, nbytes in sorted(found):
+            self._files.put(key, path, nbytes=nbytes)
+
+    def stats(self):
+        stats = self._files.stats()
+        lookups = self.hits + self.misses
+        stats.update({
+            "hits": self.hits,
+            "misses": self.misses,
+            "renders": self.renders,
+            "render_seconds": round(self.render_seconds, 3),
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        })
+        return stats
+
+
+chart_cache = ChartCache()
@@ -0,0 +1,177 @@
+# correlation.py
+import heapq
+
+import numpy as np
+import pandas as pd
+
+
+class CorrelationAccumulator:
+    """
+    Incremental pairwise-complete Pearson correlation.
+
+    Keeps four p x p sufficient-statistic matrices that are updated with one
+    BLAS matrix product per chunk, so appending rows never rescans old data
+    and two accumulators over disjoint rows can be merged. Values are
+    shifted by the first chunk's column means for numerical stability.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        p = len(self.columns)
+        self.n_rows = 0
+        self.shift = None
+        self.N = np.zeros((p, p))    # rows where both i and j are present
+        self.Sx = np.zeros((p, p))   # sum of x_i over those rows
+        self.Sxx = np.zeros((p, p))  # sum of x_i^2 over those rows
+        self.Sxy = np.zeros((p, p))  # sum of x_i * x_j
+
+    def update(self, X):
+        """Fold in a 2-D float block (rows x columns, NaN = missing)."""
+        X = np.asarray(X, dtype=float)
+        if not len(X):
+            return self
+        if self.shift is None:
+            with np.errstate(invalid="ignore"):
+                self.shift = np.nan_to_num(np.nanmean(X, axis=0)) if np.isnan(X).any() else X.mean(axis=0)
+        self.n_rows += len(X)
+
+        Xc = X - self.shift
+        mask = ~np.isnan(Xc)
+        if mask.all():
+            # fast path: one SYRK-style product, the rest are column sums
+            s = Xc.sum(axis=0)
+            ss = np.einsum("ij,ij->j", Xc, Xc)
+            self.N += len(Xc)
+            self.Sx += s[:, None]
+            self.Sxx += ss[:, None]
+            self.Sxy += Xc.T @ Xc
+        else:
+            M = mask.astype(float)
+            X0 = np.where(mask, Xc, 0.0)
+            self.N += M.T @ M
+            self.Sx += X0.T @ M
+            self.Sxx += (X0 * X0).T @ M
+            self.Sxy += X0.T @ X0
+        return self
+
+    def update_frame(self, df):
+        return self.update(df[self.columns].to_numpy(dtype=float, na_value=np.nan))
+
+    def merge(self, other):
+        if other.shift is None:
+            return self
+        if self.shift is None:
+            self.__dict__.update({k: (v.copy() if isinstance(v, np.ndarray) else v)
+                                  for k, v in other.__dict__.items()})
+            return self
+        # re-express the other side's sums around this accumulator's shift
+        d = other.shift - self.shift
+        N, Sx, Sxx, Sxy = other.N, other.Sx, other.Sxx, other.Sxy
+        Sy = Sx.T
+        self.Sxy += Sxy + d[:, None] * Sy + d[None, :] * Sx + np.outer(d, d) * N
+        self.Sxx += Sxx + 2 * d[:, None] * Sx + (d * d)[:, None] * N
+        self.Sx += Sx + d[:, None] * N
+        self.N += N
+        self.n_rows += other.n_rows
+        return self
+
+    def _block(self, rows):
+        """Correlation rows `rows` x all columns."""
+        N = self.N[rows]
+        Sx, Sxx, Sxy = self.Sx[rows], self.Sxx[rows], self.Sxy[rows]
+        Sy, Syy = self.Sx.T[rows], self.Sxx.T[rows]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = Sxy - Sx * Sy / N
+            vx = Sxx - Sx * Sx / N
+            vy = Syy - Sy * Sy / N
+            r = cov / np.sqrt(vx * vy)
+        r[N < 2] = np.nan
+        return np.clip(r, -1.0, 1.0)
+
+    def matrix(self):
+        return pd.DataFrame(self._block(slice(None)), index=self.columns, columns=self.columns)
+
+    def top_pairs(self, k=10, block_rows=256, min_periods=3):
+        """
+        Strongest |r| pairs, computed block by block so the full correlation
+        matrix is never held at once. Returns [(col_a, col_b, r), ...].
+        """
+        p = len(self.columns)
+        heap = []
+        for start in range(0, p, block_rows):
+            rows = np.arange(start, min(start + block_rows, p))
+            r = self._block(rows)
+            # upper triangle only, and only pairs with enough shared rows
+            valid = (np.arange(p)[None, :] > rows[:, None]) & (self.N[rows] >= min_periods) & ~np.isnan(r)
+            ii, jj = np.nonzero(valid)
+            if not len(ii):
+                continue
+            vals = r[ii, jj]
+            if len(vals) > k:
+                keep = np.argpartition(-np.abs(vals), k)[:k]
+                ii, jj, vals = ii[keep], jj[keep], vals[keep]
+            for i, j, v in zip(ii, jj, vals):
+                item = (abs(v), rows[i], j, v)
+                if len(heap) < k:
+                    heapq.heappush(heap, item)
+                elif item[0] > heap[0][0]:
+                    heapq.heapreplace(heap, item)
+        return [(self.columns[i], self.columns[j], float(v))
+                for _, i, j, v in sorted(heap, reverse=True)]
+
+
+def _average_ranks(v):
+    """1-based ranks of a NaN-free vector, ties sharing their average rank (pandas' "average")."""
+    order = np.argsort(v, kind="mergesort")
+    sv = v[order]
+    bounds = np.flatnonzero(np.r_[True, sv[1:] != sv[:-1], True])
+    ranks = np.empty(len(v))
+    ranks[order] = np.repeat((bounds[:-1] + bounds[1:] + 1) / 2, np.diff(bounds))
+    return ranks
+
+
+def _spearman(X):
+    """
+    Spearman accumulator matching pandas: each pair is ranked over the rows
+    where both columns are present. Columns without gaps are ranked once;
+    pairs involving a column with gaps are re-ranked over their shared rows.
+    """
+    values = X.to_numpy(dtype=float, na_value=np.nan)
+    present = ~np.isnan(values)
+    ranks = X.rank(method="average").to_numpy(dtype=float, na_value=np.nan)
+    acc = CorrelationAccumulator(X.columns).update(ranks)  # exact for pairs of complete columns
+
+    p = values.shape[1]
+    gappy = ~present.all(axis=0)
+    for i in range(p):
+        for j in range(i + 1, p):
+            if not (gappy[i] or gappy[j]):
+                continue
+            both = present[:, i] & present[:, j]
+            ri, rj = _average_ranks(values[both, i]), _average_ranks(values[both, j])
+            # ranks over m rows have mean (m + 1) / 2: store the centred sums
+            m = len(ri)
+            ci, cj = ri - (m + 1) / 2, rj - (m + 1) / 2
+            acc.N[i, j] = acc.N[j, i] = m
+            acc.Sx[i, j] = acc.Sx[j, i] = 0.0
+            acc.Sxx[i, j], acc.Sxx[j, i] = ci @ ci, cj @ cj
+            acc.Sxy[i, j] = acc.Sxy[j, i] = ci @ cj
+    return acc
+
+
+def correlate(df, columns=None, method="pearson"):
+    """
+    CorrelationAccumulator over the numeric columns of an in-memory frame.
+
+    Spearman ranks each pair over the rows both columns have (average ranks,
+    like pandas' df.corr("spearman")), so it is only available in batch
+    mode; Pearson can keep updating afterwards.
+    """
+    if columns is None:
+        columns = df.select_dtypes(include="number").columns.tolist()
+    X = df[columns]
+    if method == "spearman":
+        return _spearman(X)
+    if method != "pearson":
+        raise ValueError(f"Unsupported correlation method: {method}")
+    return CorrelationAccumulator(columns).update(X.to_numpy(dtype=float, na_value=np.nan))
@@ -0,0 +1,98 @@
+# dag.py
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from Core.jobs import bind_job, current_job, report_progress
+
+
+class Step:
+    """
+    One node of a pipeline.
+
+    `fn` is called with the results of `deps` as keyword arguments (by step
+    name). Steps marked `process=True` are CPU-bound; they also receive
+    `pool=<ProcessPoolExecutor>` to push their heavy part off the GIL.
+    """
+
+    def __init__(self, name, fn, deps=(), process=False):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.process = process
+
+
+class _StepProgress:
+    """
+    Stand-in job for a step's thread: the step's reports check for
+    cancellation and update the message, but the overall fraction stays
+    the DAG's (steps run concurrently, so their fractions would clash).
+    """
+
+    def __init__(self, job, name):
+        self.job = job
+        self.name = name
+
+    @property
+    def progress(self):
+        return self.job.progress
+
+    def report(self, fraction, message=None):
+        self.job.report(self.job.progress, f"{self.name}: {message}" if message else None)
+
+
+def _run_step(job, step, kwargs):
+    if job is None:
+        return step.fn(**kwargs)
+    with bind_job(_StepProgress(job, step.name)):
+        return step.fn(**kwargs)
+
+
+def run_dag(steps, max_workers=None, process_pool=None, poll_s=0.5):
+    """
+    Run `steps` with every step starting as soon as its dependencies finish.
+
+    Independent steps run concurrently on a thread pool, so total latency
+    approaches the slowest chain rather than the sum. A step that raises
+    yields {"error": ...} as its result (the agents' convention) and its
+    dependents still run. Returns {step name: result}.
+
+    When called inside a job, steps report to that job and a cancel request
+    stops the DAG within `poll_s` seconds (running steps stop at their next
+    progress report).
+    """
+    job = current_job()
+    steps = {s.name: s for s in steps}
+    for s in steps.values():
+        missing = [d for d in s.deps if d not in steps]
+        if missing:
+            raise ValueError(f"Step '{s.name}' depends on unknown steps {missing}.")
+
+    results = {}
+    pending = dict(steps)
+    running = {}
+    pool = ThreadPoolExecutor(max_workers=max_workers or len(steps), thread_name_prefix="insightops-dag")
+    try:
+        while pending or running:
+            ready = [s for s in pending.values() if all(d in results for d in s.deps)]
+            if not ready and not running:
+                raise ValueError(f"Dependency cycle among steps {sorted(pending)}.")
+            for s in ready:
+                del pending[s.name]
+                kwargs = {d: results[d] for d in s.deps}
+                if s.process:
+                    kwargs["pool"] = process_pool
+                running[pool.submit(_run_step, job, s, kwargs)] = s.name
+
+            done, _ = wait(running, timeout=poll_s, return_when=FIRST_COMPLETED)
+            if not done:
+                report_progress(len(results) / len(steps))  # cancellation point
+                continue
+            for fut in done:
+                name = running.pop(fut)
+                try:
+                    results[name] = fut.result()
+                except Exception as e:
+                    results[name] = {"error": f"{name} failed: {e}"}
+            report_progress(len(results) / len(steps), f"Finished {', '.join(sorted(results))}")
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return results
@@ -0,0 +1,190 @@
+# dataset.py
+import hashlib
+import pandas as pd
+
+from Core.profiler import profile
+
+DATE_NAMES = ["date", "time", "timestamp"]
+
+
+def _split_single_text_column(df):
+    """
+    If the DataFrame has exactly one column and that column (or its name)
+    looks like a comma-separated header, split it into multiple columns.
+    """
+    if df.shape[1] != 1:
+        return df
+
+    col_name = str(df.columns[0])
+    first_vals = df.iloc[:, 0].astype(str)
+
+    # Heuristics: header-like column name OR first row contains commas
+    if ("," in col_name) or (first_vals.str.contains(",").any()):
+        if "," in col_name:
+            # header stored in column name
+            new_cols = [c.strip() for c in col_name.split(",")]
+            new_df = df.iloc[:, 0].astype(str).str.split(",", expand=True)
+            new_df.columns = new_cols[: new_df.shape[1]]
+            # drop first row if it duplicates header
+            first_row = new_df.iloc[0].astype(str).tolist()
+            if all(a == b for a, b in zip(first_row, new_cols[: len(first_row)])):
+                new_df = new_df.iloc[1:].reset_index(drop=True)
+            return new_df
+        else:
+            # header stored in first row
+            splitted = df.iloc[:, 0].astype(str).str.split(",", expand=True)
+            header = splitted.iloc[0].astype(str).tolist()
+            new_df = splitted.iloc[1:].reset_index(drop=True)
+            new_df.columns = [h.strip() for h in header]
+            return new_df
+
+    return df
+
+
+def _detect_date_column(df):
+    """Return the first column that is (or is named like) a date column."""
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            return col
+    for col in df.columns:
+        if str(col).strip().lower() in DATE_NAMES:
+            return col
+    return None
+
+
+class Dataset:
+    """
+    Normalized, read-only view of an uploaded table.
+
+    Built once per upload and handed to every agent by reference, so the
+    frame is split/coerced a single time and never copied per agent.
+    Agents must treat `df` as read-only.
+    """
+
+    # a text column becomes numeric when at least this share of its
+    # non-null values parse as numbers
+    numeric_threshold = 0.9
+
+    def __init__(self, df, date_col=None, name=None):
+        self._df = df
+        self._date_col = date_col
+        self._name = name
+        self._fingerprint = None
+        self._nbytes = None
+        self._profile = None
+        self._columns = {
+            "numeric": df.select_dtypes(include="number").columns.tolist(),
+            "datetime": df.select_dtypes(include="datetime").columns.tolist(),
+            "categorical": df.select_dtypes(include=["object", "category", "string"]).columns.tolist(),
+        }
+
+    # ---------- Construction ----------
+
+    @classmethod
+    def from_frame(cls, df, name=None):
+        """Normalize a freshly parsed DataFrame into a Dataset."""
+        df = df.copy(deep=False)
+        df.columns = [str(c).strip() for c in df.columns]
+
+        # Fix "one big column" CSVs
+        df = _split_single_text_column(df)
+
+        date_col = _detect_date_column(df)
+        if date_col is not None and not pd.api.types.is_datetime64_any_dtype(df[date_col]):
+            df[date_col] = pd.to_datetime(df[date_col], errors="coerce")
+
+        # Coerce text columns that are (mostly) numeric
+        for col in df.columns:
+            if col == date_col:
+                continue
+            s = df[col]
+            if not (pd.api.types.is_object_dtype(s.dtype) or pd.api.types.is_string_dtype(s.dtype)):
+                continue
+            coerced = pd.to_numeric(s, errors="coerce")
+            valid = s.notna().sum()
+            if valid and coerced.notna().sum() >= cls.numeric_threshold * valid:
+                df[col] = coerced
+
+        return cls(df, date_col=date_col, name=name)
+
+    @classmethod
+    def wrap(cls, data):
+        """Accept either a Dataset or a raw DataFrame (legacy callers)."""
+        if data is None or isinstance(data, cls):
+            return data
+        return cls.from_frame(data)
+
+    # ---------- Accessors ----------
+
+    @property
+    def df(self):
+        return self._df
+
+    @property
+    def date_col(self):
+        return self._date_col
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def numeric_cols(self):
+        return list(self._columns["numeric"])
+
+    @property
+    def datetime_cols(self):
+        return list(self._columns["datetime"])
+
+    @property
+    def categorical_cols(self):
+        return list(self._columns["categorical"])
+
+    @property
+    def shape(self):
+        return self._df.shape
+
+    @property
+    def fingerprint(self):
+        """Stable content hash of the normalized frame."""
+        if self._fingerprint is None:
+            h = hashlib.blake2b(digest_size=16)
+            h.update(repr(list(self._df.columns)).encode())
+            h.update(pd.util.hash_pandas_object(self._df, index=False).values.tobytes())
+            self._fingerprint = h.hexdigest()
+        return self._fingerprint
+
+    @property
+    def nbytes(self):
+        """Deep memory footprint of the normalized frame."""
+        if self._nbytes is None:
+            self._nbytes = int(self._df.memory_usage(index=True, deep=True).sum())
+        return self._nbytes
+
+    def profile(self):
+        """Single-pass column profile, computed once and shared by all agents."""
+        if self._profile is None:
+            self._profile = profile(self._df)
+        return self._profile
+
+    def column_info(self):
+        """Typed column metadata: {column: {"dtype", "kind", "nulls"}}."""
+        kinds = {}
+        for kind, cols in self._columns.items():
+            for col in cols:
+                kinds[col] = kind
+        nulls = self.profile().nulls()
+        return {
+            col: {
+                "dtype": str(self._df[col].dtype),
+                "kind": kinds.get(col, "other"),
+                "nulls": int(nulls[col]),
+            }
+            for col in self._df.columns
+        }
+
+    def __len__(self):
+        return len(self._df)
+
+    def __repr__(self):
+        return f"Dataset(name={self._name!r}, shape={self.shape}, date_col={self._date_col!r})"
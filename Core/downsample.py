@@ -0,0 +1,129 @@
+# downsample.py
+"""
+Render-time reductions for charts: shrink any number of rows to roughly
+one point per output pixel before matplotlib sees them.
+"""
+import numpy as np
+
+
+def _as_numeric(x):
+    """
+    float64 view of numbers or datetimes (ns since epoch), a mask of
+    missing entries (NaN / NaT) and a back-converter.
+    """
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        unit = x.dtype
+        missing = np.isnat(x)
+        # NaT is int64 min, a finite float: mask it before converting
+        return x.astype("datetime64[ns]").astype(np.int64).astype(float), missing, \
+            lambda v: np.asarray(v).astype(np.int64).astype("datetime64[ns]").astype(unit)
+    xf = x.astype(float)
+    return xf, np.isnan(xf), lambda v: v
+
+
+def _finite_sorted(x, y):
+    xf, missing, back = _as_numeric(x)
+    y = np.asarray(y, dtype=float)
+    ok = ~missing & ~np.isnan(y)
+    xf, y = xf[ok], y[ok]
+    if len(xf) > 1 and (np.diff(xf) < 0).any():
+        order = np.argsort(xf, kind="stable")
+        xf, y = xf[order], y[order]
+    return xf, y, back
+
+
+def _buckets(xf, n_buckets):
+    span = xf[-1] - xf[0]
+    if span <= 0:
+        return np.zeros(len(xf), dtype=np.int64)
+    b = ((xf - xf[0]) / span * n_buckets).astype(np.int64)
+    return np.minimum(b, n_buckets - 1)
+
+
+def m4(x, y, width):
+    """
+    M4 downsampling: per pixel column keep the first, last, min and max
+    point. A line drawn through the result is pixel-identical to the full
+    line at `width` pixels, with at most 4 * width points.
+    """
+    xf, y, back = _finite_sorted(x, y)
+    if len(xf) <= 4 * width:
+        return back(xf), y
+    b = _buckets(xf, width)
+    starts = np.flatnonzero(np.r_[True, b[1:] != b[:-1]])
+    ends = np.r_[starts[1:], len(b)] - 1
+    # within each bucket, order by value: first = min, last = max
+    order = np.lexsort((y, b))
+    keep = np.unique(np.concatenate([starts, ends, order[starts], order[ends]]))
+    return back(xf[keep]), y[keep]
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: `n_out` visually representative points."""
+    xf, y, back = _finite_sorted(x, y)
+    n = len(xf)
+    if n <= n_out or n_out < 3:
+        return back(xf), y
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # average of the next bucket is the third triangle vertex
+        nlo, nhi = edges[i + 1], (edges[i + 2] if i + 2 < len(edges) else n)
+        cx, cy = xf[nlo:nhi].mean(), y[nlo:nhi].mean()
+        bx, by = xf[lo:hi], y[lo:hi]
+        area = np.abs((xf[a] - cx) * (by - y[a]) - (xf[a] - bx) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return back(xf[keep]), y[keep]
+
+
+def time_buckets(x, y, n_buckets, agg="mean"):
+    """
+    Aggregate `y` into `n_buckets` equal-width buckets of `x`.
+
+    Returns (bucket start, aggregated value, min, max) for non-empty
+    buckets; `agg` is "mean" or "sum". Duplicate timestamps (e.g. many
+    products per day) collapse into one value per bucket.
+    """
+    xf, y, back = _finite_sorted(x, y)
+    if not len(xf):
+        return back(xf), y, y, y
+    b = _buckets(xf, n_buckets)
+    starts = np.flatnonzero(np.r_[True, b[1:] != b[:-1]])
+    sums = np.add.reduceat(y, starts)
+    counts = np.diff(np.r_[starts, len(b)])
+    value = sums if agg == "sum" else sums / counts
+    lo = np.minimum.reduceat(y, starts)
+    hi = np.maximum.reduceat(y, starts)
+    span = (xf[-1] - xf[0]) / n_buckets if xf[-1] > xf[0] else 0.0
+    return back(xf[0] + b[starts] * span), value, lo, hi
+
+
+def position_bins(values, n_bins):
+    """Mean of `values` (rows x cols) over `n_bins` consecutive row groups."""
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if n <= n_bins:
+        return values, np.arange(n)
+    starts = np.linspace(0, n, n_bins, endpoint=False).astype(np.int64)
+    valid = ~np.isnan(values)
+    sums = np.add.reduceat(np.where(valid, values, 0.0), starts, axis=0)
+    counts = np.add.reduceat(valid.astype(float), starts, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts, starts
+
+
+def density(x, y, shape):
+    """2-D histogram of (x, y) on a `shape` = (rows, cols) grid, plus its extent."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    ok = ~np.isnan(x) & ~np.isnan(y)
+    x, y = x[ok], y[ok]
+    if not len(x):
+        return np.zeros(shape), (0, 1, 0, 1)
+    counts, xe, ye = np.histogram2d(x, y, bins=(shape[1], shape[0]))
+    return counts.T, (xe[0], xe[-1], ye[0], ye[-1])
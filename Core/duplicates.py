@@ -0,0 +1,53 @@
+# duplicates.py
+import numpy as np
+import pandas as pd
+
+
+def row_hashes(df):
+    """One 64-bit hash per row (values only, index ignored)."""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def duplicate_mask(df):
+    """Boolean array marking rows that repeat an earlier row (like df.duplicated())."""
+    return pd.Series(row_hashes(df)).duplicated().to_numpy()
+
+
+def find_duplicates(data, chunksize=None, sample=5):
+    """
+    Count duplicate rows without copying the data.
+
+    `data` is a DataFrame or an iterable of DataFrame chunks. With
+    `chunksize` (or chunks), only the set of row hashes seen so far is kept,
+    8 bytes per distinct row. Rows are compared by 64-bit hash, so two
+    different rows collide with negligible probability (~n^2 / 2^65).
+
+    Returns {"count": int, "rows": int, "sample_index": [positions]}.
+    """
+    if isinstance(data, pd.DataFrame):
+        if chunksize is None:
+            mask = duplicate_mask(data)
+            positions = np.flatnonzero(mask)
+            return {
+                "count": int(len(positions)),
+                "rows": len(data),
+                "sample_index": positions[:sample].tolist(),
+            }
+        chunks = (data.iloc[i:i + chunksize] for i in range(0, len(data), chunksize))
+    else:
+        chunks = data
+
+    seen = np.empty(0, dtype=np.uint64)
+    count = 0
+    rows = 0
+    samples = []
+    for chunk in chunks:
+        h = row_hashes(chunk)
+        dup = pd.Series(h).duplicated().to_numpy() | np.isin(h, seen)
+        positions = np.flatnonzero(dup)
+        if len(samples) < sample:
+            samples.extend((positions[: sample - len(samples)] + rows).tolist())
+        count += len(positions)
+        rows += len(chunk)
+        seen = np.union1d(seen, h)
+    return {"count": int(count), "rows": rows, "sample_index": samples}
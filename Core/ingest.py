@@ -0,0 +1,391 @@
+# ingest.py
+import codecs
+import csv
+import hashlib
+import io
+import os
+import zlib
+
+import pandas as pd
+
+from Core.cache import LRUCache
+from Core.dataset import Dataset
+
+try:
+    import xxhash
+except Exception:
+    xxhash = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.feather as pa_feather
+    import pyarrow.parquet as pa_parquet
+except Exception:
+    pa = pa_csv = pa_feather = pa_parquet = None
+
+try:
+    import zstandard
+except Exception:
+    zstandard = None
+
+# Parsed uploads live for the whole server process, so Streamlit reruns
+# (and other sessions uploading the same bytes) skip parsing entirely.
+UPLOAD_CACHE_BYTES = int(os.getenv("INSIGHTOPS_UPLOAD_CACHE_MB", "1024")) * 1024 ** 2
+upload_cache = LRUCache(max_bytes=UPLOAD_CACHE_BYTES)
+
+# Dialect detection only ever looks at this many leading bytes
+SNIFF_BYTES = 64 * 1024
+DELIMITERS = ",;\t|"
+MAGIC_COMPRESSION = [
+    (b"\x1f\x8b", "gzip"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+]
+# text columns whose sample has at most this share of distinct values
+# are loaded as categoricals
+CATEGORY_RATIO = 0.5
+BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+
+def content_hash(data):
+    """Fast hex digest of the raw upload bytes."""
+    if xxhash is not None:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _decode_prefix(prefix):
+    """Detect the encoding of a byte prefix; return (encoding, text)."""
+    for bom, encoding in BOMS:
+        if prefix.startswith(bom):
+            return encoding, codecs.getincrementaldecoder(encoding)(errors="ignore").decode(prefix)
+    try:
+        # final=False tolerates a multi-byte character cut by the prefix limit
+        return "utf-8", codecs.getincrementaldecoder("utf-8")().decode(prefix, final=False)
+    except UnicodeDecodeError:
+        return "cp1252", prefix.decode("cp1252", errors="replace")
+
+
+def _count_delimiter(lines, delimiter):
+    """Per-line count of `delimiter` when it is consistent across lines, else 0."""
+    counts = [line.count(delimiter) for line in lines]
+    if not counts or min(counts) == 0:
+        return 0
+    mode = max(set(counts), key=counts.count)
+    return mode if counts.count(mode) >= 0.9 * len(counts) else 0
+
+
+def sniff(data, sample_size=SNIFF_BYTES):
+    """
+    Detect the CSV dialect from a bounded prefix of `data` (bytes or a binary file).
+
+    Returns {"encoding", "delimiter", "quotechar", "has_header", "wrapped_lines"}.
+    `wrapped_lines` means every row is one quoted field (e.g. sample_sales.csv).
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        prefix = bytes(data[:sample_size])
+        truncated = len(data) > sample_size
+    else:
+        pos = data.tell()
+        prefix = data.read(sample_size)
+        truncated = len(data.read(1)) > 0
+        data.seek(pos)
+
+    encoding, text = _decode_prefix(prefix)
+
+    lines = text.splitlines()
+    if truncated and lines:
+        lines = lines[:-1]  # last line is probably cut short
+    lines = [line for line in lines if line.strip()]
+
+    dialect = {
+        "encoding": encoding,
+        "delimiter": ",",
+        "quotechar": '"',
+        "has_header": True,
+        "wrapped_lines": False,
+    }
+    if not lines:
+        return dialect
+
+    # Rows wrapped as a whole in quotes: sniff the text inside the quotes
+    wrapped = all(
+        len(line) > 1 and line[0] == '"' and line[-1] == '"' and '"' not in line[1:-1]
+        for line in lines
+    )
+    if wrapped:
+        lines = [line[1:-1] for line in lines]
+    dialect["wrapped_lines"] = wrapped
+
+    sample = "\n".join(lines)
+    try:
+        sniffed = csv.Sniffer().sniff(sample, delimiters=DELIMITERS)
+        dialect["delimiter"] = sniffed.delimiter
+        dialect["quotechar"] = sniffed.quotechar or '"'
+    except csv.Error:
+        best = max(DELIMITERS, key=lambda d: _count_delimiter(lines, d))
+        if _count_delimiter(lines, best):
+            dialect["delimiter"] = best
+
+    dialect["has_header"] = not _headerless(lines, dialect["delimiter"], dialect["quotechar"])
+    return dialect
+
+
+def _is_number(field):
+    try:
+        float(field)
+        return True
+    except ValueError:
+        return False
+
+
+def _headerless(lines, delimiter, quotechar, max_rows=20):
+    """
+    True only on strong evidence that row 0 is data: every field of it is
+    numeric and so are the same columns in the rows below. Otherwise row 0
+    is the header (all-text files included).
+    """
+    rows = list(csv.reader(lines[:max_rows + 1], delimiter=delimiter, quotechar=quotechar))
+    if len(rows) < 2 or not rows[0]:
+        return False
+    first = [f.strip() for f in rows[0]]
+    if not all(f and _is_number(f) for f in first):
+        return False
+    body = [r for r in rows[1:] if len(r) == len(first)]
+    return bool(body) and all(_is_number(f.strip()) for r in body for f in r if f.strip())
+
+
+def detect_format(data, name=None):
+    """Return (format, compression) from magic bytes, falling back to the file name."""
+    head = bytes(data[:8])
+    if head.startswith(b"PAR1"):
+        return "parquet", None
+    if head.startswith(b"ARROW1") or head.startswith(b"FEA1"):
+        return "feather", None
+    if head.startswith(b"\xff\xff\xff\xff"):
+        return "arrow_stream", None
+    for magic, compression in MAGIC_COMPRESSION:
+        if head.startswith(magic):
+            return "csv", compression
+
+    ext = os.path.splitext((name or "").lower())[1]
+    if ext in (".parquet", ".pq"):
+        return "parquet", None
+    if ext in (".feather", ".arrow", ".ipc"):
+        return "feather", None
+    return "csv", None
+
+
+def _head(data, compression, size):
+    """First `size` decompressed bytes of a (possibly compressed) CSV."""
+    if compression == "gzip":
+        return zlib.decompressobj(wbits=31).decompress(bytes(data[: size * 4]), size)
+    if compression == "zstd":
+        if zstandard is None:
+            raise ImportError("zstd CSV uploads need the 'zstandard' package.")
+        reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data))
+        return reader.read(size)
+    return bytes(data[:size])
+
+
+def _infer_categories(prefix, dialect):
+    """
+    Parse only the sniffed prefix and pick text columns that repeat enough
+    to be stored as categoricals (Region, Category, Product, ...).
+
+    Names are returned as the parser sees them, before _fix_columns(): with
+    wrapped lines the first and last header names keep their stray quote.
+    """
+    body = prefix[: prefix.rfind(b"\n") + 1] or prefix
+    try:
+        sample = _parse_csv(body, dialect, None, categories=(), fix=False)
+    except Exception:
+        return []
+
+    categories = []
+    for col in sample.columns:
+        s = sample[col]
+        if not pd.api.types.is_object_dtype(s) or s.count() < 2:
+            continue
+        if dialect["wrapped_lines"]:
+            s = s.str.strip('"')
+        # numeric or date-like text is coerced later, never categorical
+        if pd.to_numeric(s, errors="coerce").notna().mean() > 0.5:
+            continue
+        if pd.to_datetime(s, errors="coerce", format="mixed").notna().mean() > 0.5:
+            continue
+        if s.nunique() <= CATEGORY_RATIO * s.count():
+            categories.append(col)
+    return categories
+
+
+def _parse_csv(data, dialect, compression, categories, fix=True):
+    """
+    Parse CSV bytes with pyarrow's multithreaded reader (pandas C engine
+    fallback). `categories` are column names as the parser reports them
+    (see _infer_categories()).
+    """
+    wrapped = dialect["wrapped_lines"]
+    header = dialect["has_header"]
+
+    if pa_csv is not None:
+        encoding = dialect["encoding"]
+        source = pa.input_stream(pa.py_buffer(data), compression=compression)
+        table = pa_csv.read_csv(
+            source,
+            read_options=pa_csv.ReadOptions(
+                use_threads=True,
+                # pyarrow skips a UTF-8 BOM itself
+                encoding="utf8" if encoding in ("utf-8", "utf-8-sig") else encoding,
+                autogenerate_column_names=not header,
+            ),
+            parse_options=pa_csv.ParseOptions(
+                delimiter=dialect["delimiter"],
+                # whole-row quotes are not field quotes; strip them after parsing
+                quote_char=False if wrapped else dialect["quotechar"],
+            ),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={c: pa.dictionary(pa.int32(), pa.string()) for c in categories},
+                strings_can_be_null=True,
+            ),
+        )
+        df = table.to_pandas(date_as_object=False, split_blocks=True, self_destruct=True)
+    else:
+        df = pd.read_csv(
+            io.BytesIO(data),
+            sep=dialect["delimiter"],
+            quotechar=dialect["quotechar"],
+            quoting=csv.QUOTE_NONE if wrapped else csv.QUOTE_MINIMAL,
+            encoding=dialect["encoding"],
+            header=0 if header else None,
+            compression=compression,
+            dtype={c: "category" for c in categories},
+        )
+
+    return _fix_columns(df, dialect) if fix else df
+
+
+def _fix_columns(df, dialect):
+    """Name header-less columns and strip whole-row quotes after parsing."""
+    if not dialect["has_header"]:
+        df.columns = [f"col_{i}" for i in range(df.shape[1])]
+
+    if dialect["wrapped_lines"] and df.shape[1]:
+        df.columns = [str(c).strip('"') for c in df.columns]
+        for pos in {0, df.shape[1] - 1}:
+            col = df.iloc[:, pos]
+            if isinstance(col.dtype, pd.CategoricalDtype):
+                stripped = col.cat.categories.str.strip('"')
+                if stripped.is_unique:
+                    df.isetitem(pos, col.cat.rename_categories(stripped))
+                else:
+                    df.isetitem(pos, col.astype(object).str.strip('"').astype("category"))
+            elif pd.api.types.is_object_dtype(col):
+                df.isetitem(pos, col.str.strip('"'))
+
+    return df
+
+
+def downcast(df):
+    """
+    Shrink integer columns to the smallest dtype that holds their range.
+
+    Floats stay float64 so summary statistics keep full precision.
+    """
+    for pos in range(df.shape[1]):
+        col = df.iloc[:, pos]
+        if pd.api.types.is_integer_dtype(col) and not pd.api.types.is_bool_dtype(col):
+            df.isetitem(pos, pd.to_numeric(col, downcast="integer"))
+    return df
+
+
+def read_table(data, name=None, dialect=None):
+    """Parse raw upload bytes (CSV, gzip/zstd CSV, Parquet, Feather/Arrow IPC)."""
+    fmt, compression = detect_format(data, name)
+
+    if fmt != "csv":
+        if pa is None:
+            raise ImportError(f"Reading {fmt} uploads needs the 'pyarrow' package.")
+        buf = pa.py_buffer(data)
+        if fmt == "parquet":
+            table = pa_parquet.read_table(buf, use_threads=True)
+        elif fmt == "feather":
+            table = pa_feather.read_table(buf, use_threads=True)
+        else:
+            table = pa.ipc.open_stream(buf).read_all()
+        return downcast(table.to_pandas(date_as_object=False, split_blocks=True, self_destruct=True))
+
+    prefix = _head(data, compression, SNIFF_BYTES + 1)
+    dialect = dialect or sniff(prefix)
+    categories = _infer_categories(prefix, dialect)
+    return downcast(_parse_csv(data, dialect, compression, categories))
+
+
+def iter_chunks(source, chunksize=200_000):
+    """
+    Yield DataFrame chunks of a file path (or raw bytes) without loading it whole.
+
+    CSV (plain or gzip/zstd) is read with pandas' chunked parser, Parquet by
+    row batches and Feather/Arrow IPC through a memory map.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        name, prefix = None, bytes(source[: SNIFF_BYTES * 4])
+        opener = lambda: io.BytesIO(source)
+    else:
+        name = str(source)
+        with open(name, "rb") as f:
+            prefix = f.read(SNIFF_BYTES * 4)
+        opener = lambda: name
+
+    fmt, compression = detect_format(prefix, name)
+
+    if fmt != "csv":
+        if pa is None:
+            raise ImportError(f"Reading {fmt} files needs the 'pyarrow' package.")
+        if fmt == "parquet":
+            batches = pa_parquet.ParquetFile(opener()).iter_batches(batch_size=chunksize)
+        else:
+            buf = pa.memory_map(name) if name else pa.py_buffer(source)
+            if fmt == "arrow_stream":
+                batches = pa.ipc.open_stream(buf)
+            else:
+                reader = pa.ipc.open_file(buf)
+                batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        for batch in batches:
+            yield batch.to_pandas(date_as_object=False)
+        return
+
+    dialect = sniff(_head(prefix, compression, SNIFF_BYTES + 1))
+    reader = pd.read_csv(
+        opener(),
+        sep=dialect["delimiter"],
+        quotechar=dialect["quotechar"],
+        quoting=csv.QUOTE_NONE if dialect["wrapped_lines"] else csv.QUOTE_MINIMAL,
+        encoding=dialect["encoding"],
+        header=0 if dialect["has_header"] else None,
+        compression=compression,
+        chunksize=chunksize,
+    )
+    with reader:
+        for chunk in reader:
+            yield _fix_columns(chunk, dialect)
+
+
+def load_dataset(data, name=None):
+    """
+    Return the normalized Dataset for `data`, parsing it only on a cache miss.
+
+    Returns (key, dataset) where `key` is the content hash of the bytes.
+    """
+    key = content_hash(data)
+    dataset = upload_cache.get(key)
+    if dataset is None:
+        dataset = Dataset.from_frame(read_table(data, name=name), name=name)
+        upload_cache.put(key, dataset, nbytes=dataset.nbytes)
+    return key, dataset
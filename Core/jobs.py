@@ -0,0 +1,205 @@
+# jobs.py
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+_local = threading.local()
+
+
+class JobCancelled(BaseException):
+    """
+    Raised inside a job when cancellation was requested.
+
+    A BaseException (like asyncio.CancelledError) so the agents' broad
+    `except Exception` fallbacks don't swallow it.
+    """
+
+
+def current_job():
+    """The Job running on this thread, or None outside the job runner."""
+    return getattr(_local, "job", None)
+
+
+@contextmanager
+def bind_job(job):
+    """
+    Make `job` current on this thread for the duration of the block, e.g.
+    in helper threads a job fans out to, so their progress reports and
+    cancellation checks reach it.
+    """
+    previous = current_job()
+    _local.job = job
+    try:
+        yield job
+    finally:
+        _local.job = previous
+
+
+def report_progress(fraction, message=None):
+    """
+    Report progress from inside agent code; a no-op outside a job.
+
+    Doubles as the cancellation point: raises JobCancelled once the job's
+    cancel() has been called, so long loops should call it between steps.
+    """
+    job = current_job()
+    if job is not None:
+        job.report(fraction, message)
+
+
+class Job:
+    """One submitted call: status, progress, and its result or error."""
+
+    def __init__(self, job_id, key=None, name="job"):
+        self.id = job_id
+        self.key = key
+        self.name = name
+        self.status = PENDING
+        self.progress = 0.0
+        self.message = ""
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.future = None
+        self._cancel = threading.Event()
+
+    @property
+    def done(self):
+        return self.status in FINISHED
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def report(self, fraction, message=None):
+        self.progress = min(max(float(fraction), 0.0), 1.0)
+        if message is not None:
+            self.message = message
+        if self._cancel.is_set():
+            raise JobCancelled(self.id)
+
+    def cancel(self):
+        """Request cancellation; pending jobs never start, running ones stop at the next report."""
+        self._cancel.set()
+        if self.future is not None and self.future.cancel():
+            self.status = CANCELLED
+            self.finished = time.time()
+        return self.status
+
+    def snapshot(self):
+        return {
+            "id": self.id, "name": self.name, "status": self.status,
+            "progress": self.progress, "message": self.message,
+            "elapsed": self.elapsed, "error": self.error,
+        }
+
+
+class JobRunner:
+    """
+    Runs agent calls on a thread pool so the Streamlit script never blocks.
+
+    submit() returns a Job immediately; the UI polls `job.status` /
+    `job.progress` on each rerun. Jobs submitted with a `key` are
+    deduplicated: while one is pending or running, submitting the same key
+    returns the in-flight job instead of starting another. The last `keep`
+    finished jobs stay available by id.
+    """
+
+    def __init__(self, max_workers=4, keep=100):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="insightops-job")
+        self._jobs = OrderedDict()  # id -> Job, oldest first
+        self._active = {}           # key -> id of the unfinished job
+        # re-entrant: a job that finishes instantly runs _release inside submit()
+        self._lock = threading.RLock()
+        self.keep = keep
+
+    def submit(self, fn, *args, key=None, name=None, **kwargs):
+        with self._lock:
+            if key is not None and key in self._active:
+                return self._jobs[self._active[key]]
+            job = Job(uuid.uuid4().hex[:12], key, name or getattr(fn, "__name__", "job"))
+            self._jobs[job.id] = job
+            if key is not None:
+                self._active[key] = job.id
+            self._trim()
+            job.future = self._pool.submit(self._run, job, fn, args, kwargs)
+            job.future.add_done_callback(lambda _: self._release(job))
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        if job.cancel_requested:
+            job.status = CANCELLED
+            job.finished = time.time()
+            return
+        job.status = RUNNING
+        job.started = time.time()
+        _local.job = job
+        try:
+            job.result = fn(*args, **kwargs)
+            job.progress = 1.0
+            job.status = DONE
+        except JobCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            job.error = f"{e}\n{traceback.format_exc()}"
+            job.status = FAILED
+        finally:
+            _local.job = None
+            job.finished = time.time()
+
+    def _release(self, job):
+        # also runs for futures cancelled before they started
+        if job.status not in FINISHED:
+            job.status = CANCELLED
+            job.finished = time.time()
+        with self._lock:
+            if self._active.get(job.key) == job.id:
+                del self._active[job.key]
+
+    def _trim(self):
+        finished = [jid for jid, j in self._jobs.items() if j.done]
+        for jid in finished[: max(0, len(finished) - self.keep)]:
+            del self._jobs[jid]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def find(self, key):
+        """The in-flight job for `key`, if any."""
+        with self._lock:
+            job_id = self._active.get(key)
+            return self._jobs.get(job_id) if job_id else None
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        return job.cancel() if job else None
+
+    def jobs(self):
+        with self._lock:
+            return [j.snapshot() for j in self._jobs.values()]
+
+    def shutdown(self, wait=False):
+        for job in list(self._jobs.values()):
+            if not job.done:
+                job.cancel()
+        self._pool.shutdown(wait=wait, cancel_futures=True)
@@ -13,6 +13,16 @@ if openai and OPENAI_API_KEY:
     openai.api_key = OPENAI_API_KEY
 
 
+def _group_by(text):
+    """Grouping words from "by product and region" / "per sku" / "for each store"."""
+    m = re.search(r"\b(?:by|per|for each|each)\s+([a-z_][\w ,&]*)", text)
+    if not m:
+        return []
+    words = re.split(r"\s*(?:,|&|\band\b|\s)\s*", m.group(1))
+    return [w for w in words if w and not w.isdigit()
+            and w not in ("next", "for", "days", "day", "the", "slide", "slides")]
+
+
 class LLMAgent:
     def __init__(self, model="gpt-4o-mini" if openai else None):
         self.model = model
@@ -36,6 +46,12 @@ class LLMAgent:
         if any(w in text for w in ["eda", "explore", "exploratory", "describe the data"]):
             intent = "run_eda"
 
+            # exact vs sampled statistics
+            if any(w in text for w in ["exact", "full", "precise"]):
+                params["mode"] = "exact"
+            elif any(w in text for w in ["approx", "quick", "sample", "fast"]):
+                params["mode"] = "approx"
+
         # 2. Charts
         elif any(w in text for w in ["chart", "plot", "graph", "visual"]):
             intent = "generate_chart"
@@ -44,18 +60,36 @@ class LLMAgent:
             m = re.search(r"(bar|line|scatter|heatmap)", text)
             if m:
                 params["chart_type"] = m.group(1)
+            if any(w in text for w in ["interactive", "zoom", "plotly", "webgl"]):
+                params["interactive"] = True
 
         # 3. Forecast with day extraction
-        elif any(w in text for w in ["forecast", "predict", "future", "next"]):
+        elif any(w in text for w in ["forecast", "predict", "future", "next", "backtest"]):
             intent = "forecast"
 
             # extract "forecast 30 days" / "next 14 days"
             m = re.search(r"(\d+)\s*(day|days)", text)
             params["days"] = int(m.group(1)) if m else None
 
-        # 4. Report
+            if any(w in text for w in ["backtest", "benchmark", "compare models"]):
+                params["backtest"] = True
+            if any(w in text for w in ["best model", "auto"]):
+                params["engine"] = "auto"
+            elif any(w in text for w in ["baseline", "quick", "fast"]):
+                params["engine"] = "baseline"
+            elif "arima" in text:
+                params["engine"] = "arima"
+
+            group_by = _group_by(text)
+            if group_by:
+                params["group_by"] = group_by
+
+        # 4. Report ("report per product and region" adds a slide per group)
         elif any(w in text for w in ["report", "ppt", "presentation", "deck"]):
             intent = "generate_report"
+            group_by = _group_by(text)
+            if group_by:
+                params["group_by"] = group_by
 
         # 5. Summary / insights
         elif any(w in text for w in ["summary", "insight", "insights",
@@ -1,36 +1,197 @@
 # memory_manager.py
-import json, os
+import json
+import os
+import threading
+import time
+import uuid
+import weakref
+
+
+def _append(path, buffer):
+    """Append the buffered lines to `path` (fsynced) and empty `buffer` in place."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("".join(buffer))
+        f.flush()
+        os.fsync(f.fileno())
+    buffer.clear()
+
+
+def _flush_on_close(path, buffer):
+    if buffer:
+        try:
+            _append(path, buffer)
+        except OSError:
+            pass
+
+
+class AppendLog:
+    """
+    Key/value store persisted as an append-only JSON Lines log.
+
+    Every write appends one {"k": key, "v": value} record (a None value is
+    a delete) to an in-memory buffer that is flushed in batches: after
+    `batch_size` records, after `flush_interval` seconds, on flush(), and
+    when the log is garbage-collected or the process exits. Reads are served from an in-memory index. When the log holds
+    more than `compact_ratio` times as many records as live keys it is
+    rewritten through a temp file + os.replace, so a crash leaves either
+    the old or the new file, never a half-written one. A torn last line
+    from a crash mid-append is skipped on load.
+    """
+
+    def __init__(self, path, batch_size=32, flush_interval=2.0, compact_ratio=4, legacy_path=None):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.compact_ratio = compact_ratio
+        self.index = {}
+        self._buffer = []
+        self._records = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.RLock()
+        self._seq = {}  # key prefix -> last number handed out by next_key()
+        self._load(legacy_path)
+        # the finalizer holds the buffer list, not the log: flush() and
+        # compact() must empty it in place
+        weakref.finalize(self, _flush_on_close, self.path, self._buffer)
+
+    def _load(self, legacy_path):
+        if os.path.exists(self.path):
+            torn = False
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        torn = True
+                        continue
+                    self._apply(rec["k"], rec.get("v"))
+                    self._records += 1
+            if torn:
+                # drop the partial record before anything is appended after it
+                self.compact()
+        elif legacy_path and os.path.exists(legacy_path):
+            # one-time migration from the old rewrite-everything JSON file
+            try:
+                with open(legacy_path, "r", encoding="utf-8") as f:
+                    self.index.update(json.load(f))
+            except (OSError, ValueError):
+                pass
+            if self.index:
+                self.compact()
+
+    def _apply(self, key, value):
+        if value is None:
+            self.index.pop(key, None)
+        else:
+            self.index[key] = value
+
+    def put(self, key, value):
+        with self._lock:
+            self._apply(key, value)
+            self._buffer.append(json.dumps({"k": key, "v": value}, default=str) + "\n")
+            if (len(self._buffer) >= self.batch_size
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self.flush()
+
+    def get(self, key, default=None):
+        return self.index.get(key, default)
+
+    def delete(self, key):
+        self.put(key, None)
+
+    def next_key(self, prefix):
+        """Next unused "<prefix>_<n>" key (numbers continue across restarts)."""
+        with self._lock:
+            if prefix not in self._seq:
+                seq = 0
+                for key in self.index:
+                    head, _, tail = str(key).rpartition("_")
+                    if head == prefix and tail.isdigit():
+                        seq = max(seq, int(tail))
+                self._seq[prefix] = seq
+            self._seq[prefix] += 1
+            return f"{prefix}_{self._seq[prefix]}"
+
+    def flush(self):
+        with self._lock:
+            if self._buffer:
+                n = len(self._buffer)
+                _append(self.path, self._buffer)
+                self._records += n
+            self._last_flush = time.monotonic()
+            if self._records > self.compact_ratio * max(len(self.index), 16):
+                self.compact()
+
+    def compact(self):
+        """Rewrite the log with one record per live key (atomic replace)."""
+        with self._lock:
+            self._buffer.clear()
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for key, value in self.index.items():
+                    f.write(json.dumps({"k": key, "v": value}, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            self._records = len(self.index)
+            self._last_flush = time.monotonic()
+
+
+# one AppendLog per file in the process, shared by every MemoryManager
+# using it: separate instances would each compact away the others' records
+_open_logs = weakref.WeakValueDictionary()  # real path -> AppendLog
+_open_lock = threading.Lock()
+
 
 class MemoryManager:
-    def __init__(self, session_file="session_storage.json", memory_file="memory_bank.json"):
+    def __init__(self, session_file="session_storage.jsonl", memory_file="memory_bank.jsonl",
+                 session_id=None, session_dir="session_storage", batch_size=32, flush_interval=2.0):
+        # one conversation log per browser session, so users never share history
+        if session_id is not None:
+            session_file = os.path.join(session_dir, f"{session_id}.jsonl")
         self.session_file = session_file
         self.memory_file = memory_file
-        self.session_state = self._load(self.session_file)
-        self.memory = self._load(self.memory_file)
-
-    def _load(self, path):
-        if os.path.exists(path):
-            try:
-                with open(path, "r") as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
+        self._session = self._open(session_file, batch_size, flush_interval)
+        self._memory = self._open(memory_file, batch_size, flush_interval)
+        # live views (kept for callers that read the dicts directly)
+        self.session_state = self._session.index
+        self.memory = self._memory.index
 
-    def _save(self, path, obj):
-        with open(path, "w") as f:
-            json.dump(obj, f, indent=2)
+    @staticmethod
+    def _open(path, batch_size, flush_interval):
+        real = os.path.realpath(path)
+        with _open_lock:
+            log = _open_logs.get(real)
+            if log is None:
+                legacy = path[:-1] if path.endswith(".jsonl") else None  # old .json file
+                log = AppendLog(path, batch_size=batch_size, flush_interval=flush_interval, legacy_path=legacy)
+                _open_logs[real] = log
+            return log
 
     def remember_session(self, key, value):
-        self.session_state[key] = value
-        self._save(self.session_file, self.session_state)
+        self._session.put(key, value)
 
     def recall_session(self, key):
-        return self.session_state.get(key)
+        return self._session.get(key)
+
+    def remember_message(self, value, prefix="msg"):
+        """Store `value` under the next free "<prefix>_<n>" key and return the key."""
+        key = self._session.next_key(prefix)
+        self._session.put(key, value)
+        return key
 
     def remember_longterm(self, key, value):
-        self.memory[key] = value
-        self._save(self.memory_file, self.memory)
+        self._memory.put(key, value)
 
     def recall_longterm(self, key):
-        return self.memory.get(key)
+        return self._memory.get(key)
+
+    def flush(self):
+        self._session.flush()
+        self._memory.flush()
+
+    def compact(self):
+        self._session.compact()
+        self._memory.compact()
@@ -0,0 +1,44 @@
+# process_pool.py
+import atexit
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+PROCESS_WORKERS = int(os.getenv("INSIGHTOPS_PROCESS_WORKERS", "2"))
+
+_pool = None
+_lock = threading.Lock()
+
+
+def get_pool():
+    """The process-wide pool for CPU-heavy steps, created on first use."""
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PROCESS_WORKERS)
+        return _pool
+
+
+def terminate(pool):
+    """
+    Stop `pool` without waiting for its tasks: hung workers (e.g. a stuck
+    Auto-ARIMA fit) are killed. If it is the shared pool, the next
+    get_pool() starts a fresh one.
+    """
+    global _pool
+    with _lock:
+        if pool is _pool:
+            _pool = None
+    for proc in list((getattr(pool, "_processes", None) or {}).values()):
+        if proc.is_alive():
+            proc.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def shutdown():
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,312 @@
+# profiler.py
+import numpy as np
+import pandas as pd
+
+from Core.correlation import CorrelationAccumulator
+from Core.sketches import KLL, KMV, HyperLogLog, MisraGries, Moments, hash_values
+
+QUANTILES = [0.25, 0.5, 0.75]
+
+
+class Profile:
+    """
+    Per-column summary computed in one chunked pass over a DataFrame.
+
+    `columns` maps column -> {"kind", "count", "nulls", "mean", "var", "std",
+    "min", "max", "quantiles", "distinct", "top"}; `describe()` formats it
+    the way `df.describe(include="all").to_dict()` did.
+
+    Approximate profiles (see Core/sampling.py) also carry `intervals`,
+    `sample_rows` and `confidence`; `describe()` then adds "<stat>_ci" keys.
+    """
+
+    def __init__(self, columns, n_rows):
+        self.columns = columns
+        self.n_rows = n_rows
+        self.intervals = None
+        self.sample_rows = None
+        self.confidence = None
+
+    @property
+    def approximate(self):
+        return self.intervals is not None
+
+    def nulls(self):
+        return {col: p["nulls"] for col, p in self.columns.items()}
+
+    def variances(self):
+        """Variance of numeric columns, highest first."""
+        var = {col: p["var"] for col, p in self.columns.items()
+               if p["kind"] == "numeric" and not pd.isna(p["var"])}
+        return pd.Series(var, dtype=float).sort_values(ascending=False)
+
+    def describe(self):
+        out = {}
+        for col, p in self.columns.items():
+            if p["kind"] == "categorical":
+                top, freq = (p["top"][0] if p["top"] else (np.nan, np.nan))
+                out[col] = {"count": p["count"], "unique": p["distinct"], "top": top, "freq": freq}
+            else:
+                fmt = _to_timestamp if p["kind"] == "datetime" else (lambda v: v)
+                stats = {"count": p["count"], "mean": fmt(p["mean"])}
+                if p["kind"] == "numeric":
+                    stats["std"] = p["std"]
+                stats["min"] = fmt(p["min"])
+                for q, v in zip(QUANTILES, p["quantiles"]):
+                    stats[f"{int(q * 100)}%"] = fmt(v)
+                stats["max"] = fmt(p["max"])
+                out[col] = stats
+            if self.intervals:
+                fmt = _to_timestamp if p["kind"] == "datetime" else (lambda v: v)
+                for stat, (lo, hi) in self.intervals[col].items():
+                    if stat in ("count", "nulls", "freq"):
+                        out[col][f"{stat}_ci"] = (lo, hi)
+                    else:
+                        out[col][f"{stat}_ci"] = (fmt(lo), fmt(hi))
+        return out
+
+
+def _to_timestamp(v):
+    return pd.NaT if pd.isna(v) else pd.Timestamp(int(v))
+
+
+def _kind(s):
+    if pd.api.types.is_datetime64_any_dtype(s.dtype):
+        return "datetime"
+    if pd.api.types.is_numeric_dtype(s.dtype) and not pd.api.types.is_bool_dtype(s.dtype):
+        return "numeric"
+    return "categorical"
+
+
+def _as_float(s):
+    if pd.api.types.is_datetime64_any_dtype(s.dtype):
+        values = s.to_numpy(dtype="datetime64[ns]").view(np.int64).astype(float)
+        values[s.isna().to_numpy()] = np.nan
+        return values
+    return s.to_numpy(dtype=float, na_value=np.nan)
+
+
+def _block(df, cols):
+    """Column-major float64 block of `cols` (NaN for missing values)."""
+    X = np.empty((len(df), len(cols)), order="F")
+    for j, col in enumerate(cols):
+        X[:, j] = _as_float(df[col])
+    return X
+
+
+def profile(df, top_k=5, chunk_rows=262144, quantile_sample=100_000, distinct_k=1024, seed=0):
+    """
+    Profile every column of `df` in a single chunked, vectorized pass.
+
+    Numeric/datetime columns share one Moments accumulator; quantiles come
+    from a uniform row sample, distinct counts from KMV sketches over row
+    hashes, and top-k values from category codes / value counts.
+    """
+    n_rows = len(df)
+    kinds = {col: _kind(df[col]) for col in df.columns}
+    num_cols = [c for c in df.columns if kinds[c] != "categorical"]
+    cat_cols = [c for c in df.columns if kinds[c] == "categorical"]
+
+    moments = Moments(len(num_cols))
+    distinct = {col: KMV(distinct_k) for col in num_cols}
+
+    for start in range(0, max(n_rows, 1), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        if num_cols:
+            X = _block(chunk, num_cols)
+            moments.update(X)
+            for j, col in enumerate(num_cols):
+                valid = ~np.isnan(X[:, j])
+                distinct[col].update(hash_values(X[valid, j]))
+
+    # quantiles on a uniform sample of rows
+    quantiles = {}
+    if num_cols:
+        if n_rows > quantile_sample:
+            rows = np.sort(np.random.default_rng(seed).choice(n_rows, quantile_sample, replace=False))
+            sample = df[num_cols].iloc[rows]
+        else:
+            sample = df[num_cols]
+        S = _block(sample, num_cols)
+        for j, col in enumerate(num_cols):
+            v = S[:, j]
+            v = v[~np.isnan(v)]
+            quantiles[col] = np.quantile(v, QUANTILES).tolist() if len(v) else [np.nan] * len(QUANTILES)
+
+    columns = {}
+    for col in df.columns:
+        if kinds[col] == "categorical":
+            continue
+        j = num_cols.index(col)
+        count = int(moments.n[j])
+        columns[col] = {
+            "kind": kinds[col],
+            "count": count,
+            "nulls": int(moments.nulls[j]),
+            "mean": moments.mean[j] if count else np.nan,
+            "var": moments.var[j],
+            "std": moments.std[j],
+            "min": moments.min[j],
+            "max": moments.max[j],
+            "quantiles": quantiles[col],
+            "distinct": distinct[col].estimate(),
+            "top": [],
+        }
+
+    for col in cat_cols:
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            codes = s.cat.codes.to_numpy()
+            counts = np.bincount(codes[codes >= 0], minlength=len(s.cat.categories))
+            vc = pd.Series(counts, index=s.cat.categories)
+            vc = vc[vc > 0].sort_values(ascending=False, kind="stable")
+        else:
+            vc = s.value_counts(dropna=True)
+        count = int(vc.sum())
+        columns[col] = {
+            "kind": "categorical",
+            "count": count,
+            "nulls": n_rows - count,
+            "mean": np.nan, "var": np.nan, "std": np.nan,
+            "min": np.nan, "max": np.nan,
+            "quantiles": [np.nan] * len(QUANTILES),
+            "distinct": int(len(vc)),
+            "top": [(k, int(v)) for k, v in vc.head(top_k).items()],
+        }
+
+    # keep the frame's column order
+    return Profile({col: columns[col] for col in df.columns}, n_rows)
+
+
+class StreamingProfiler:
+    """
+    Builds a Profile chunk by chunk with bounded memory.
+
+    Column kinds are fixed from the first chunk (same rules as Dataset);
+    later chunks are coerced to match. Numeric columns keep Welford moments,
+    a KLL quantile sketch and a HyperLogLog; text columns keep Misra–Gries
+    heavy hitters and a HyperLogLog. Memory does not grow with row count.
+    """
+
+    def __init__(self, top_k=5, hll_p=14, kll_k=400, mg_k=64, track_correlation=False):
+        self.top_k = top_k
+        self.track_correlation = track_correlation
+        self.correlation = None
+        self.hll_p = hll_p
+        self.kll_k = kll_k
+        self.mg_k = mg_k
+        self.kinds = None
+        self.n_rows = 0
+
+    def _setup(self, chunk):
+        # lazy import: Dataset itself depends on this module
+        from Core.dataset import Dataset
+
+        dataset = Dataset.from_frame(chunk)
+        self.columns = list(dataset.df.columns)
+        self.kinds = {col: _kind(dataset.df[col]) for col in self.columns}
+        self.num_cols = [c for c in self.columns if self.kinds[c] != "categorical"]
+        self.cat_cols = [c for c in self.columns if self.kinds[c] == "categorical"]
+        self.moments = Moments(len(self.num_cols))
+        self.quantiles = {c: KLL(self.kll_k) for c in self.num_cols}
+        self.distinct = {c: HyperLogLog(self.hll_p) for c in self.columns}
+        self.heavy = {c: MisraGries(self.mg_k) for c in self.cat_cols}
+        self.cat_nulls = {c: 0 for c in self.cat_cols}
+        self._corr_idx = [j for j, c in enumerate(self.num_cols) if self.kinds[c] == "numeric"]
+        if self.track_correlation:
+            self.correlation = CorrelationAccumulator([self.num_cols[j] for j in self._corr_idx])
+
+    def _coerce(self, chunk):
+        chunk = chunk.copy(deep=False)
+        chunk.columns = [str(c).strip() for c in chunk.columns]
+        for col in self.num_cols:
+            if col not in chunk.columns:
+                chunk[col] = np.nan
+            elif self.kinds[col] == "datetime":
+                if not pd.api.types.is_datetime64_any_dtype(chunk[col].dtype):
+                    chunk[col] = pd.to_datetime(chunk[col], errors="coerce")
+            elif not pd.api.types.is_numeric_dtype(chunk[col].dtype):
+                chunk[col] = pd.to_numeric(chunk[col], errors="coerce")
+        for col in self.cat_cols:
+            if col not in chunk.columns:
+                chunk[col] = None
+        return chunk
+
+    def update(self, chunk):
+        if self.kinds is None:
+            self._setup(chunk)
+        chunk = self._coerce(chunk)
+        self.n_rows += len(chunk)
+
+        if self.num_cols:
+            X = _block(chunk, self.num_cols)
+            self.moments.update(X)
+            if self.correlation is not None:
+                self.correlation.update(X[:, self._corr_idx])
+            for j, col in enumerate(self.num_cols):
+                v = X[:, j]
+                v = v[~np.isnan(v)]
+                self.quantiles[col].update(v)
+                self.distinct[col].update(hash_values(v))
+
+        for col in self.cat_cols:
+            s = chunk[col]
+            valid = s.dropna()
+            self.cat_nulls[col] += len(s) - len(valid)
+            self.heavy[col].update(valid)
+            self.distinct[col].update(hash_values(valid.astype(str).to_numpy(dtype=object)))
+        return self
+
+    def merge(self, other):
+        """Combine with a profiler that saw other chunks of the same source."""
+        if other.kinds is None:
+            return self
+        if self.kinds is None:
+            return other
+        self.n_rows += other.n_rows
+        self.moments.merge(other.moments)
+        if self.correlation is not None and other.correlation is not None:
+            self.correlation.merge(other.correlation)
+        for col in self.num_cols:
+            self.quantiles[col].merge(other.quantiles[col])
+        for col in self.columns:
+            self.distinct[col].merge(other.distinct[col])
+        for col in self.cat_cols:
+            self.heavy[col].merge(other.heavy[col])
+            self.cat_nulls[col] += other.cat_nulls[col]
+        return self
+
+    def result(self):
+        columns = {}
+        if self.kinds is None:
+            return Profile(columns, 0)
+
+        for j, col in enumerate(self.num_cols):
+            count = int(self.moments.n[j])
+            columns[col] = {
+                "kind": self.kinds[col],
+                "count": count,
+                "nulls": int(self.moments.nulls[j]),
+                "mean": self.moments.mean[j] if count else np.nan,
+                "var": self.moments.var[j],
+                "std": self.moments.std[j],
+                "min": self.moments.min[j],
+                "max": self.moments.max[j],
+                "quantiles": self.quantiles[col].quantiles(QUANTILES),
+                "distinct": self.distinct[col].estimate(),
+                "top": [],
+            }
+        for col in self.cat_cols:
+            heavy = self.heavy[col]
+            columns[col] = {
+                "kind": "categorical",
+                "count": heavy.n,
+                "nulls": self.cat_nulls[col],
+                "mean": np.nan, "var": np.nan, "std": np.nan,
+                "min": np.nan, "max": np.nan,
+                "quantiles": [np.nan] * len(QUANTILES),
+                "distinct": self.distinct[col].estimate(),
+                "top": heavy.top(self.top_k),
+            }
+        return Profile({col: columns[col] for col in self.columns}, self.n_rows)
+
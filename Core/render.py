@@ -0,0 +1,80 @@
+# render.py
+"""
+Thread-safe chart rendering on matplotlib's object-oriented API.
+
+Figures are created directly on an Agg canvas and never registered with
+pyplot, so any number of threads can draw and save them at once. Code
+that can only draw through pyplot's global "current figure" (some SHAP
+plots) must do so inside `pyplot_figure()`, which serializes it.
+"""
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+DPI = 150
+
+_pyplot_lock = threading.RLock()
+
+
+def new_figure(figsize=(10, 6)):
+    """A standalone Figure with its own Agg canvas (no pyplot state)."""
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def save_figure(fig, path, dpi=DPI, **kwargs):
+    """Write `fig` to `path` (PNG unless `format` says otherwise)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    kwargs.setdefault("format", "png")
+    fig.savefig(path, dpi=dpi, **kwargs)
+    return path
+
+
+def figure_bytes(fig, dpi=DPI, **kwargs):
+    """Encode `fig` in memory and return the PNG bytes."""
+    buf = io.BytesIO()
+    kwargs.setdefault("format", "png")
+    fig.savefig(buf, dpi=dpi, **kwargs)
+    return buf.getvalue()
+
+
+@contextmanager
+def pyplot_figure(figsize=None):
+    """
+    Hold the process-wide pyplot lock and yield a fresh pyplot figure; it
+    is closed on exit. For third-party plots that only draw on plt.gcf().
+    """
+    import matplotlib.pyplot as plt
+
+    with _pyplot_lock:
+        fig = plt.figure(figsize=figsize)
+        try:
+            yield fig
+        finally:
+            plt.close("all")
+
+
+def render_many(tasks, max_workers=4):
+    """
+    Run independent render callables concurrently and return their results
+    in order. A task that raises yields the exception instead of a result.
+    """
+    tasks = list(tasks)
+    if not tasks:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tasks)),
+                            thread_name_prefix="insightops-render") as pool:
+        futures = [pool.submit(task) for task in tasks]
+    results = []
+    for fut in futures:
+        try:
+            results.append(fut.result())
+        except Exception as e:
+            results.append(e)
+    return results
@@ -0,0 +1,55 @@
+# result_cache.py
+import json
+import os
+
+from Core.cache import LRUCache
+
+
+class ResultCache:
+    """
+    Memoizes agent results keyed by (dataset fingerprint, agent, params).
+
+    Repeated intents on the same data are served from memory; entries for a
+    dataset are dropped as soon as a different dataset is loaded.
+    """
+
+    def __init__(self, max_bytes=None, ttl=None):
+        if max_bytes is None:
+            max_bytes = int(os.getenv("INSIGHTOPS_RESULT_CACHE_MB", "256")) * 1024 ** 2
+        if ttl is None:
+            ttl = float(os.getenv("INSIGHTOPS_RESULT_CACHE_TTL", "3600"))
+        self._cache = LRUCache(max_bytes=max_bytes, ttl=ttl)
+
+    @staticmethod
+    def make_key(fingerprint, agent, params=None):
+        # normalized params: key order and None-valued params don't matter
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        return (fingerprint, agent, json.dumps(params, sort_keys=True, default=str))
+
+    def get_or_compute(self, fingerprint, agent, params, compute):
+        """Return the cached result, or run `compute()` and cache it."""
+        if fingerprint is None:
+            return compute()
+
+        key = self.make_key(fingerprint, agent, params)
+        result = self._cache.get(key)
+        if result is not None:
+            return result
+
+        result = compute()
+        # errors are cheap and may be transient; don't pin them
+        if not (isinstance(result, dict) and "error" in result):
+            self._cache.put(key, result)
+        return result
+
+    def invalidate(self, fingerprint=None):
+        """Drop every entry for `fingerprint` (or everything when None)."""
+        if fingerprint is None:
+            self._cache.clear()
+            return
+        for key in self._cache.keys():
+            if key[0] == fingerprint:
+                self._cache.pop(key)
+
+    def stats(self):
+        return self._cache.stats()
@@ -0,0 +1,107 @@
+# sampling.py
+import time
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from Core.profiler import QUANTILES, profile
+
+
+def reservoir_sample(chunks, k, seed=0):
+    """
+    Uniform sample of `k` rows from an iterable of DataFrame chunks.
+
+    Vectorized bottom-k reservoir: every row gets a random key and the k
+    smallest keys seen so far are kept, so memory stays O(k).
+    """
+    rng = np.random.default_rng(seed)
+    kept, keys = None, np.empty(0)
+    for chunk in chunks:
+        chunk_keys = rng.random(len(chunk))
+        pool = chunk if kept is None else pd.concat([kept, chunk], ignore_index=True)
+        pool_keys = np.concatenate([keys, chunk_keys])
+        if len(pool) > k:
+            idx = np.argpartition(pool_keys, k)[:k]
+            pool, pool_keys = pool.iloc[idx].reset_index(drop=True), pool_keys[idx]
+        kept, keys = pool, pool_keys
+    return kept if kept is not None else pd.DataFrame()
+
+
+def stratified_sample(df, by, n, seed=0):
+    """Proportional stratified sample of about `n` rows (at least one per stratum)."""
+    frac = min(1.0, n / max(len(df), 1))
+    codes = df.groupby(by, observed=True, sort=False, dropna=False).ngroup().to_numpy()
+    sizes = np.bincount(codes)
+    quota = np.maximum(1, np.round(sizes * frac)).astype(int)
+
+    # rank rows within their stratum by a random key; keep the first `quota`
+    keys = np.random.default_rng(seed).random(len(df))
+    order = np.lexsort((keys, codes))
+    rank = np.empty(len(df), dtype=np.int64)
+    rank[order] = np.arange(len(df)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    return df[rank < quota[codes]]
+
+
+def rows_for_budget(df, budget_s, pilot_rows=20_000, min_rows=10_000):
+    """Sample size that `profile()` can process within `budget_s` seconds."""
+    pilot = df.iloc[:pilot_rows]
+    start = time.perf_counter()
+    profile(pilot)
+    per_row = (time.perf_counter() - start) / max(len(pilot), 1)
+    return max(min_rows, int(budget_s / max(per_row, 1e-9)))
+
+
+def approximate_profile(sample, population_rows, confidence=0.95):
+    """
+    Profile a sample and attach confidence intervals for the population.
+
+    Means use the t/normal interval with finite-population correction,
+    null counts and category frequencies the Wald interval on proportions,
+    and quartiles the distribution-free order-statistic interval.
+    """
+    prof = profile(sample)
+    n, N = len(sample), max(population_rows, len(sample))
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    fpc = np.sqrt((N - n) / (N - 1)) if N > 1 else 0.0
+    scale = N / max(n, 1)
+
+    def prop_interval(count):
+        p = count / max(n, 1)
+        half = z * np.sqrt(p * (1 - p) / max(n, 1)) * fpc
+        return [max(0.0, p - half) * N, min(1.0, p + half) * N]
+
+    intervals = {}
+    for col, p in prof.columns.items():
+        ci = {"nulls": prop_interval(p["nulls"]), "count": prop_interval(p["count"])}
+        if p["kind"] != "categorical" and p["count"] > 1:
+            if p["kind"] == "numeric":
+                half = z * p["std"] / np.sqrt(p["count"]) * fpc
+                ci["mean"] = [p["mean"] - half, p["mean"] + half]
+            values = np.sort(_numeric(sample[col]))
+            m = len(values)
+            for q in QUANTILES:
+                lo = int(np.floor(m * q - z * np.sqrt(m * q * (1 - q))))
+                hi = int(np.ceil(m * q + z * np.sqrt(m * q * (1 - q))))
+                ci[f"{int(q * 100)}%"] = [values[max(lo, 0)], values[min(hi, m - 1)]]
+        if p["kind"] == "categorical" and p["top"]:
+            ci["freq"] = prop_interval(p["top"][0][1])
+        intervals[col] = ci
+
+        # scale counts up to the population
+        p["nulls"] = int(round(p["nulls"] * scale))
+        p["count"] = int(round(p["count"] * scale))
+        p["top"] = [(k, int(round(v * scale))) for k, v in p["top"]]
+
+    prof.n_rows = N
+    prof.sample_rows = n
+    prof.confidence = confidence
+    prof.intervals = intervals
+    return prof
+
+
+def _numeric(s):
+    if pd.api.types.is_datetime64_any_dtype(s.dtype):
+        values = s.dropna().to_numpy(dtype="datetime64[ns]").view(np.int64).astype(float)
+        return values
+    return s.to_numpy(dtype=float, na_value=np.nan)[s.notna().to_numpy()]
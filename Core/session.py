@@ -0,0 +1,132 @@
+# session.py
+import os
+import threading
+import time
+
+from Core.cache import LRUCache
+from Core.chart_cache import chart_cache
+from Core.ingest import upload_cache
+from Core.result_cache import ResultCache
+from Core.shared_memory import release as release_shared
+
+# Process-wide, read-only caches shared by every session. Parsed uploads
+# live in Core.ingest.upload_cache and rendered charts in
+# Core.chart_cache.chart_cache; upload entries in use by a session are pinned.
+MODEL_CACHE_BYTES = int(os.getenv("INSIGHTOPS_MODEL_CACHE_MB", "256")) * 1024 ** 2
+model_cache = LRUCache(max_bytes=MODEL_CACHE_BYTES)
+result_cache = ResultCache()
+
+
+class Session:
+    """
+    One browser session: its own agents, supervisor and conversation
+    memory. Datasets, fitted models and results come from the shared caches.
+    """
+
+    def __init__(self, session_id, agents, supervisor, memory=None):
+        self.id = session_id
+        self.agents = agents
+        self.supervisor = supervisor
+        self.memory = memory
+        self.dataset_key = None
+        self.dataset = None
+        self.last_seen = time.time()
+        self.registry = None
+
+    def load(self, key, dataset):
+        """
+        Hand `dataset` (cached under upload key `key`) to every agent,
+        unless it is already loaded. Returns {agent name: error} for agents
+        that failed to take it.
+        """
+        if key == self.dataset_key:
+            return {}
+        old_key, old_dataset = self.dataset_key, self.dataset
+        if self.registry is not None:
+            self.registry.acquire_dataset(key)
+        self.dataset_key, self.dataset = key, dataset
+
+        errors = {}
+        for name, agent in self.agents.items():
+            try:
+                agent.receive_data(dataset)
+            except Exception as e:
+                errors[name] = str(e)
+        self.supervisor.receive_data(dataset)
+
+        if old_key is not None and self.registry is not None:
+            self.registry.release_dataset(old_key, old_dataset)
+        return errors
+
+    def close(self):
+        if self.dataset_key is not None and self.registry is not None:
+            self.registry.release_dataset(self.dataset_key, self.dataset)
+        self.dataset_key = self.dataset = None
+
+
+class SessionRegistry:
+    """
+    Process-wide map of session id -> Session.
+
+    `factory(session_id)` builds a new Session. Sessions idle for longer
+    than `idle_ttl` seconds are closed on the next lookup. When the last
+    session using a dataset lets go of it, its upload-cache entry becomes
+    evictable and its cached results and shared-memory copy are dropped.
+    """
+
+    def __init__(self, factory, idle_ttl=3600.0):
+        self.factory = factory
+        self.idle_ttl = idle_ttl
+        self._sessions = {}
+        self._dataset_refs = {}  # upload key -> sessions using it
+        self._lock = threading.RLock()
+
+    def get(self, session_id):
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = self.factory(session_id)
+                session.registry = self
+            session.last_seen = time.time()
+            return session
+
+    def close(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is not None:
+            session.close()
+
+    def _expire(self):
+        now = time.time()
+        idle = [sid for sid, s in self._sessions.items() if now - s.last_seen > self.idle_ttl]
+        for sid in idle:
+            self._sessions.pop(sid).close()
+
+    def acquire_dataset(self, key):
+        with self._lock:
+            self._dataset_refs[key] = self._dataset_refs.get(key, 0) + 1
+            upload_cache.acquire(key)
+
+    def release_dataset(self, key, dataset):
+        with self._lock:
+            refs = self._dataset_refs.get(key, 0) - 1
+            if refs > 0:
+                self._dataset_refs[key] = refs
+            else:
+                self._dataset_refs.pop(key, None)
+            upload_cache.release(key)
+        if refs <= 0 and dataset is not None:
+            result_cache.invalidate(dataset.fingerprint)
+            release_shared(dataset.fingerprint)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "dataset_refs": dict(self._dataset_refs),
+                "datasets": upload_cache.stats(),
+                "models": model_cache.stats(),
+                "results": result_cache.stats(),
+                "charts": chart_cache.stats(),
+            }
@@ -0,0 +1,196 @@
+# shared_memory.py
+"""
+Publish a Dataset once into shared memory so process-pool workers can
+attach to it by name instead of unpickling a copy of the DataFrame.
+
+Numeric, boolean and datetime columns are stored as raw NumPy buffers and
+come back as zero-copy views; text/categorical columns are stored as
+integer codes plus their (small) category list. A worker only receives a
+`DatasetHandle`: the segment name and the column layout.
+"""
+import atexit
+import threading
+from collections import OrderedDict
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from Core.dataset import Dataset
+
+ALIGN = 64  # column offsets are cache-line aligned
+
+MAX_ATTACHED = 2  # datasets a worker keeps mapped; older ones are closed
+
+_published = {}  # fingerprint -> SharedDataset (publisher side)
+_attached = OrderedDict()  # segment name -> (SharedMemory, Dataset, owned) (worker side, oldest first)
+_lock = threading.Lock()
+
+
+class DatasetHandle:
+    """Picklable description of a published Dataset."""
+
+    def __init__(self, shm_name, columns, n_rows, date_col=None, name=None, fingerprint=None):
+        self.shm_name = shm_name
+        self.columns = columns  # [(column, kind, dtype str, offset, extra)]
+        self.n_rows = n_rows
+        self.date_col = date_col
+        self.name = name
+        self.fingerprint = fingerprint
+
+
+def _encode(s):
+    """(kind, array, extra) for one column; extra carries categories / tz."""
+    dtype = s.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return "category", s.cat.codes.to_numpy(), (list(dtype.categories), dtype.ordered)
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        tz = getattr(dtype, "tz", None)
+        values = s.dt.tz_convert("UTC").dt.tz_localize(None) if tz is not None else s
+        return "datetime", values.to_numpy(), str(tz) if tz else None
+    if pd.api.types.is_bool_dtype(dtype) and not s.isna().any():
+        return "numpy", s.to_numpy(dtype=bool), None
+    if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+        if isinstance(dtype, np.dtype):
+            return "numpy", s.to_numpy(), None
+        # nullable extension ints/floats: NaN marks missing
+        return "numpy", s.to_numpy(dtype=float, na_value=np.nan), None
+    # text / mixed: codes + categories
+    cat = pd.Categorical(s)
+    return "category", cat.codes, (list(cat.categories), False)
+
+
+class SharedDataset:
+    """
+    Owner of one shared-memory segment holding a Dataset's columns.
+
+    Keep it alive while workers may attach; close() unlinks the segment.
+    """
+
+    def __init__(self, dataset):
+        df = dataset.df
+        encoded, offset = [], 0
+        for col in df.columns:
+            kind, values, extra = _encode(df[col])
+            values = np.ascontiguousarray(values)
+            encoded.append((col, kind, values, offset, extra))
+            offset += -(-values.nbytes // ALIGN) * ALIGN
+
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        columns = []
+        for col, kind, values, off, extra in encoded:
+            np.ndarray(values.shape, values.dtype, buffer=self.shm.buf, offset=off)[:] = values
+            columns.append((col, kind, values.dtype.str, off, extra))
+
+        self.handle = DatasetHandle(self.shm.name, columns, len(df), dataset.date_col,
+                                    dataset.name, dataset.fingerprint)
+        self.nbytes = offset
+
+    def close(self):
+        if self.shm is not None:
+            self.shm.unlink()
+            try:
+                self.shm.close()
+            except BufferError:
+                pass  # views still in use; the mapping goes when they do
+            self.shm = None
+
+
+def publish(dataset):
+    """Handle for `dataset`, publishing it on first use (one segment per fingerprint)."""
+    with _lock:
+        shared = _published.get(dataset.fingerprint)
+        if shared is None or shared.shm is None:
+            shared = _published[dataset.fingerprint] = SharedDataset(dataset)
+        return shared.handle
+
+
+def release(fingerprint=None):
+    """Unlink the segment for `fingerprint` (all segments when None)."""
+    with _lock:
+        keys = list(_published) if fingerprint is None else [fingerprint]
+        for key in keys:
+            shared = _published.pop(key, None)
+            if shared is not None:
+                if shared.shm is not None:
+                    _attached.pop(shared.shm.name, None)
+                shared.close()
+
+
+atexit.register(release)
+
+
+def _open(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        pass
+    # the publisher owns the segment: take this one back out of the worker's
+    # resource tracker so it isn't unlinked when the worker exits
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm
+
+
+def _close(shm, owned):
+    if owned:
+        return  # the publisher's segment; release() closes it
+    try:
+        shm.close()
+    except BufferError:
+        pass  # views still in use; the mapping goes when they do
+
+
+def detach(shm_name=None):
+    """Close a worker's mapping of `shm_name` (all of them when None)."""
+    with _lock:
+        names = list(_attached) if shm_name is None else [shm_name]
+        entries = [_attached.pop(n) for n in names if n in _attached]
+    for shm, _, owned in entries:
+        _close(shm, owned)
+
+
+def attach(handle):
+    """
+    Dataset backed by the published segment (call in the worker).
+
+    Numeric and datetime columns are views over shared memory, so the
+    frame must be treated as read-only. Repeated calls in the same worker
+    reuse the attachment; a worker keeps the last MAX_ATTACHED datasets
+    mapped and closes older ones (see also detach()).
+    """
+    with _lock:
+        cached = _attached.get(handle.shm_name)
+        if cached is not None:
+            _attached.move_to_end(handle.shm_name)
+            return cached[1]
+
+    owner = _published.get(handle.fingerprint)
+    owned = owner is not None and owner.shm is not None and owner.shm.name == handle.shm_name
+    shm = owner.shm if owned else _open(handle.shm_name)  # owned: attaching in the publishing process
+    data = {}
+    for col, kind, dtype, offset, extra in handle.columns:
+        values = np.ndarray((handle.n_rows,), np.dtype(dtype), buffer=shm.buf, offset=offset)
+        values.flags.writeable = False
+        if kind == "category":
+            categories, ordered = extra
+            data[col] = pd.Categorical.from_codes(values, categories=categories, ordered=ordered)
+        elif kind == "datetime" and extra:
+            data[col] = pd.DatetimeIndex(values).tz_localize("UTC").tz_convert(extra)
+        else:
+            data[col] = values
+    df = pd.DataFrame(data, copy=False)
+
+    dataset = Dataset(df, date_col=handle.date_col, name=handle.name)
+    dataset._fingerprint = handle.fingerprint
+    with _lock:
+        _attached[handle.shm_name] = (shm, dataset, owned)
+        evicted = []
+        while len(_attached) > MAX_ATTACHED:
+            evicted.append(_attached.popitem(last=False)[1])
+    for old_shm, _, old_owned in evicted:
+        _close(old_shm, old_owned)
+    return dataset
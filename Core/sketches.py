@@ -0,0 +1,228 @@
+# sketches.py
+"""
+Mergeable column statistics.
+
+Every sketch is vectorized over columns, can be updated chunk by chunk and
+merged with another sketch of the same columns, so a profile can be built
+in one pass (or in parallel) without holding the whole table.
+"""
+import numpy as np
+import pandas as pd
+
+HASH_MAX = float(2 ** 64)
+
+
+def hash_values(values):
+    """64-bit hashes of a 1-D array/Series (nulls hash too; callers mask them)."""
+    return pd.util.hash_array(np.asarray(values), categorize=True)
+
+
+class Moments:
+    """Count / null count / mean / variance / min / max per column (Chan-Welford)."""
+
+    def __init__(self, n_cols):
+        self.n = np.zeros(n_cols)
+        self.nulls = np.zeros(n_cols, dtype=np.int64)
+        self.mean = np.zeros(n_cols)
+        self.m2 = np.zeros(n_cols)
+        self.min = np.full(n_cols, np.nan)
+        self.max = np.full(n_cols, np.nan)
+
+    def update(self, X):
+        """Fold in a 2-D float block (rows x columns, NaN = missing)."""
+        mask = ~np.isnan(X)
+        n_b = mask.sum(axis=0).astype(float)
+        self.nulls += X.shape[0] - n_b.astype(np.int64)
+        if not n_b.any():
+            return
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if n_b.min() == X.shape[0]:
+                # fast path: no missing values in this block
+                mean_b = X.mean(axis=0)
+                dev = X - mean_b
+            else:
+                mean_b = np.where(mask, X, 0.0).sum(axis=0) / n_b
+                dev = np.where(mask, X - mean_b, 0.0)
+            m2_b = np.einsum("ij,ij->j", dev, dev)
+            # fmin/fmax skip NaN unless a whole column is missing
+            min_b = np.fmin.reduce(X, axis=0)
+            max_b = np.fmax.reduce(X, axis=0)
+        self._combine(n_b, np.nan_to_num(mean_b), m2_b, min_b, max_b)
+
+    def merge(self, other):
+        self.nulls += other.nulls
+        self._combine(other.n, other.mean, other.m2, other.min, other.max)
+        return self
+
+    def _combine(self, n_b, mean_b, m2_b, min_b, max_b):
+        n = self.n + n_b
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = mean_b - self.mean
+            self.mean = np.where(n > 0, self.mean + delta * n_b / n, 0.0)
+            self.m2 = np.where(n > 0, self.m2 + m2_b + delta * delta * self.n * n_b / n, 0.0)
+        self.min = np.fmin(self.min, min_b)
+        self.max = np.fmax(self.max, max_b)
+        self.n = n
+
+    @property
+    def var(self):
+        """Sample variance (ddof=1), like pandas."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.n > 1, self.m2 / (self.n - 1), np.nan)
+
+    @property
+    def std(self):
+        return np.sqrt(self.var)
+
+
+class KMV:
+    """K-minimum-values distinct count estimator for one column."""
+
+    def __init__(self, k=1024):
+        self.k = k
+        self.values = np.empty(0, dtype=np.uint64)
+
+    def update(self, hashes):
+        if len(self.values) == self.k:
+            # only hashes below the current k-th minimum can change the sketch
+            hashes = hashes[hashes < self.values[-1]]
+        if len(hashes) > 4 * self.k:
+            candidates = np.partition(hashes, 4 * self.k)[: 4 * self.k + 1]
+            # heavy duplication may leave fewer than k distinct candidates
+            if len(np.unique(candidates)) >= self.k:
+                hashes = candidates
+        merged = np.union1d(self.values, hashes)
+        self.values = merged[: self.k]
+
+    def merge(self, other):
+        self.update(other.values)
+        return self
+
+    def estimate(self):
+        if len(self.values) < self.k:
+            return len(self.values)  # exact below k distinct values
+        return int((self.k - 1) / (float(self.values[-1]) / HASH_MAX))
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter over 64-bit hashes (2**p registers)."""
+
+    def __init__(self, p=14):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def update(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if not len(hashes):
+            return
+        idx = (hashes >> np.uint64(64 - self.p)).astype(np.intp)
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        # rank = position of the leftmost 1-bit in the remaining 64-p bits
+        _, exp = np.frexp(rest.astype(float))
+        rank = np.where(rest == 0, 64 - self.p + 1, 64 - self.p - exp + 1).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        est = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(int)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if est <= 2.5 * m and zeros:
+            est = m * np.log(m / zeros)  # linear counting for small cardinalities
+        return int(round(est))
+
+
+class MisraGries:
+    """Mergeable Misra–Gries heavy hitters; counts undercount by at most n / (k + 1)."""
+
+    def __init__(self, k=64):
+        self.k = k
+        self.counts = pd.Series(dtype="int64")
+        self.n = 0
+
+    def update(self, values):
+        """Fold in a Series of values (nulls ignored)."""
+        vc = pd.Series(values).value_counts(dropna=True)
+        self.n += int(vc.sum())
+        self._absorb(vc)
+
+    def merge(self, other):
+        self.n += other.n
+        self._absorb(other.counts)
+        return self
+
+    def _absorb(self, vc):
+        counts = self.counts.add(vc, fill_value=0).astype("int64")
+        if len(counts) > self.k:
+            counts = counts.sort_values(ascending=False)
+            counts = counts - counts.iloc[self.k]
+            counts = counts[counts > 0]
+        self.counts = counts
+
+    def top(self, n=5):
+        return [(k, int(v)) for k, v in self.counts.sort_values(ascending=False).head(n).items()]
+
+
+class KLL:
+    """KLL quantile sketch for one numeric stream (mergeable, O(k) memory)."""
+
+    def __init__(self, k=400, c=2 / 3, seed=0):
+        self.k = k
+        self.c = c
+        self.levels = [np.empty(0)]
+        self.n = 0
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, h):
+        depth = len(self.levels) - h - 1
+        return max(2, int(np.ceil(self.k * self.c ** depth)))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                level = np.sort(level)
+                # an odd leftover stays behind; the rest is halved upwards
+                keep = level[-1:] if len(level) % 2 else level[:0]
+                pairs = level[: len(level) - len(keep)]
+                promoted = pairs[self._rng.integers(2)::2]
+                self.levels[h] = keep
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            h += 1
+
+    def quantiles(self, qs):
+        items = np.concatenate(self.levels)
+        if not len(items):
+            return [np.nan] * len(qs)
+        weights = np.concatenate([np.full(len(l), 2.0 ** h) for h, l in enumerate(self.levels)])
+        order = np.argsort(items)
+        items, cum = items[order], np.cumsum(weights[order])
+        ranks = np.asarray(qs) * cum[-1]
+        return items[np.minimum(np.searchsorted(cum, ranks), len(items) - 1)].tolist()
@@ -1,11 +1,131 @@
+
+from Core.dag import Step, run_dag
 from Core.llm_router import LLMAgent
+from Core.process_pool import get_pool
+from Core.result_cache import ResultCache
+from Core.shared_memory import release
+import os
 import re
 
 class SupervisorAgent:
-    def __init__(self, memory_manager, logger=None):
+    def __init__(self, memory_manager, logger=None, result_cache=None, approx_rows=5_000_000,
+                 forecast_budget_s=30.0, arima_cost_s=1.5):
         self.memory = memory_manager
         self.logger = logger
+        self.approx_rows = approx_rows  # EDA switches to sampled mode above this many rows
+        # grouped forecasts use vectorized baselines when Auto-ARIMA would blow the budget
+        self.forecast_budget_s = forecast_budget_s
+        self.arima_cost_s = arima_cost_s
         self.llm = LLMAgent()
+        # a cache passed in may be shared with other sessions: its owner
+        # decides when a dataset's results go (see Core/session.py)
+        self._own_results = result_cache is None
+        self.results = result_cache or ResultCache()
+        self.dataset = None
+
+    def receive_data(self, dataset):
+        """Track the active dataset; results computed on the previous one are dropped."""
+        old = self.dataset
+        self.dataset = dataset
+        if (self._own_results and old is not None
+                and (dataset is None or old.fingerprint != dataset.fingerprint)):
+            self.results.invalidate(old.fingerprint)
+            release(old.fingerprint)  # shared-memory copy for process workers, if any
+
+    def _fingerprint(self, agents):
+        dataset = self.dataset
+        if dataset is None:
+            # agents loaded directly (without going through the supervisor)
+            dataset = next((getattr(a, "dataset", None) for a in agents.values()
+                            if getattr(a, "dataset", None) is not None), None)
+        return dataset.fingerprint if dataset is not None else None
+
+    def _resolve_columns(self, agent, words):
+        """Map words like "products", "region" onto the agent's column names."""
+        if getattr(agent, "data", None) is None:
+            return []
+        lookup = {str(c).lower(): c for c in agent.data.columns}
+        cols = []
+        for w in words:
+            col = lookup.get(w) or lookup.get(w.rstrip("s"))
+            if col is not None and col not in cols:
+                cols.append(col)
+        return cols
+
+    def _forecast_engine(self, agent, keys, requested=None):
+        """Auto-ARIMA per series unless the series count or latency budget says otherwise."""
+        if requested:
+            return requested
+        n_series = agent.count_series(keys)
+        est = n_series * self.arima_cost_s / (os.cpu_count() or 1)
+        if n_series > agent.max_arima_series or est > self.forecast_budget_s:
+            return "baseline"
+        return "arima"
+
+    def _eda_mode(self, agents):
+        """Sampled EDA for very large tables, exact otherwise."""
+        data = getattr(agents["eda"], "data", None)
+        return "approx" if data is not None and len(data) > self.approx_rows else "exact"
+
+    def _eda_strata(self, agents, max_strata=50, probe_rows=100_000):
+        """
+        First categorical column with at most `max_strata` values (judged on
+        the leading rows): sampled EDA is stratified by it so small groups
+        are still represented.
+        """
+        eda = agents["eda"]
+        if eda.dataset is None:
+            return None
+        head = eda.data.iloc[:probe_rows]
+        for col in eda.dataset.categorical_cols:
+            if head[col].nunique(dropna=False) <= max_strata:
+                return [col]
+        return None
+
+    def _eda(self, agents, mode):
+        strata = self._eda_strata(agents) if mode == "approx" else None
+        return self._cached(agents, "eda", {"mode": mode, "strata": strata},
+                            lambda: agents["eda"].analyze(mode=mode, strata=strata))
+
+    def _report(self, agents, group_by=None):
+        """
+        Build the PPTX from a DAG: summary, EDA, forecast and chart run
+        concurrently (the Auto-ARIMA fit in a worker process), then the
+        slides are assembled once all four are done. With `group_by`, the
+        deck adds a slide per group, charted in parallel while it is written.
+        """
+        mode = self._eda_mode(agents)
+        keys = self._resolve_columns(agents["forecast"], group_by or [])
+        fp = self._fingerprint(agents) or "data"
+        suffix = f"_by_{'_'.join(map(str, keys))}" if keys else ""
+        path = os.path.join("assets", "reports", f"insightops_report_{fp[:16]}{suffix}.pptx")
+
+        def build(simple, eda, forecast, chart, sections):
+            agents["report"].collect(
+                simple.get("insights"),
+                eda.get("insights"),
+                forecast.get("insights")
+            )
+            return agents["report"].generate(
+                path,
+                chart.get("path") if chart.get("success") else None,
+                sections=sections if isinstance(sections, list) else None
+            )
+
+        results = run_dag([
+            Step("simple", lambda: self._cached(agents, "simple", {}, agents["simple"].analyze)),
+            Step("eda", lambda: self._eda(agents, mode)),
+            Step("forecast", lambda pool: self._cached(agents, "forecast", {"days": 7, "engine": "arima"},
+                                                       lambda: agents["forecast"].forecast(days=7, pool=pool)),
+                 process=True),
+            Step("chart", lambda: agents["chart"].generate_chart(chart_type="line")),
+            Step("sections", lambda: agents["report"].group_sections(keys, agents["forecast"].target_col)),
+            Step("report", build, deps=("simple", "eda", "forecast", "chart", "sections")),
+        ], process_pool=get_pool())
+        return results["report"]
+
+    def _cached(self, agents, name, params, compute):
+        return self.results.get_or_compute(self._fingerprint(agents), name, params, compute)
 
     def _log(self, msg):
         if self.logger:
@@ -25,10 +145,7 @@ class SupervisorAgent:
 
             # Remember conversation
             try:
-                self.memory.remember_session(
-                    f"msg_{len(self.memory.session_state)+1}",
-                    {"user": user_message, "parsed": parsed}
-                )
+                self.memory.remember_message({"user": user_message, "parsed": parsed})
             except:
                 pass
 
@@ -38,16 +155,22 @@ class SupervisorAgent:
 
             # ========== SIMPLE ==========
             if intent == "run_simple":
-                return {"route": "simple", "result": agents["simple"].analyze()}
+                result = self._cached(agents, "simple", {}, agents["simple"].analyze)
+                return {"route": "simple", "result": result}
 
             # ========== EDA ==========
             if intent == "run_eda":
-                return {"route": "eda", "result": agents["eda"].analyze()}
+                mode = params.get("mode") or self._eda_mode(agents)
+                result = self._eda(agents, mode)
+                return {"route": "eda", "result": result}
 
             # ========== CHART GENERATION ==========
             if intent == "generate_chart":
                 chart_type = params.get("chart_type", "line")
-                result = agents["chart"].generate_chart("assets/chart.png", chart_type)
+                if params.get("interactive"):
+                    result = agents["chart"].generate_interactive(chart_type)
+                else:
+                    result = agents["chart"].generate_chart(chart_type=chart_type)
                 return {"route": "chart", "result": result}
 
             # ========== FORECASTING ==========
@@ -58,26 +181,29 @@ class SupervisorAgent:
                     m = re.search(r"(\\d+)", msg)
                     days = int(m.group(1)) if m else 7
 
-                res = agents["forecast"].forecast(days=int(days))
+                days = int(days)
+                if "group_by" in params:
+                    fc_agent = agents["forecast"]
+                    keys = self._resolve_columns(fc_agent, params["group_by"]) or fc_agent.group_keys()
+                    engine = self._forecast_engine(fc_agent, keys, params.get("engine"))
+                    res = self._cached(agents, "forecast_groups", {"days": days, "keys": keys, "engine": engine},
+                                       lambda: fc_agent.forecast_groups(days=days, keys=keys, engine=engine))
+                    return {"route": "forecast", "result": res}
+
+                if params.get("backtest"):
+                    res = agents["forecast"].benchmark(days=days)
+                    return {"route": "forecast", "result": res}
+
+                engine = params.get("engine") or "arima"
+                res = self._cached(agents, "forecast", {"days": days, "engine": engine},
+                                   lambda: agents["forecast"].forecast(days=days, engine=engine))
                 return {"route": "forecast", "result": res}
 
             # ========== REPORT ==========
             if intent == "generate_report":
-                simple = agents["simple"].analyze()
-                eda = agents["eda"].analyze()
-                forecast = agents["forecast"].forecast()
-
-                agents["report"].collect(
-                    simple.get("insights"),
-                    eda.get("insights"),
-                    forecast.get("insights")
-                )
-
-                pptx_path = agents["report"].generate(
-                    "assets/insightops_report.pptx",
-                    "assets/chart.png"
-                )
-
+                pptx_path = self._report(agents, params.get("group_by"))
+                if isinstance(pptx_path, dict):
+                    return {"route": "error", "result": pptx_path["error"]}
                 return {"route": "report", "result": pptx_path}
 
             # ========== UNKNOWN ==========
@@ -0,0 +1,98 @@
+# timeseries.py
+import numpy as np
+import pandas as pd
+
+# candidate grids, finest first, used when the observed spacing would
+# produce more than `max_points` periods
+COARSE_FREQS = ["min", "h", "D", "W", "MS", "QS", "YS"]
+
+
+def as_datetime(s):
+    if pd.api.types.is_datetime64_any_dtype(s.dtype):
+        return s
+    return pd.to_datetime(s, errors="coerce")
+
+
+def infer_frequency(dates, max_points=10_000):
+    """
+    Pandas frequency string for a column of timestamps.
+
+    Tries `pd.infer_freq` on the distinct sorted timestamps, then the most
+    common spacing (so gaps and duplicates don't defeat it). If that grid
+    would exceed `max_points` periods, the first coarser calendar frequency
+    that fits is used instead.
+    """
+    idx = pd.DatetimeIndex(pd.unique(dates.dropna())).sort_values()
+    if len(idx) < 2:
+        return "D"
+
+    freq = pd.infer_freq(idx) if len(idx) >= 3 else None
+    if freq is None:
+        step = pd.Series(np.diff(idx.asi8)).mode().iloc[0]
+        step = pd.Timedelta(int(step))
+        if step >= pd.Timedelta(days=28) and (idx.day == 1).all():
+            freq = "MS"
+        else:
+            freq = pd.tseries.frequencies.to_offset(step).freqstr
+
+    for candidate in [freq] + COARSE_FREQS:
+        if _n_periods(idx[0], idx[-1], candidate) <= max_points:
+            return candidate
+    return COARSE_FREQS[-1]
+
+
+def _n_periods(start, end, freq):
+    offset = pd.tseries.frequencies.to_offset(freq)
+    if isinstance(offset, pd.offsets.Tick):
+        return (end - start).value // offset.nanos + 1
+    return len(pd.date_range(start, end, freq=offset))
+
+
+def _fill(wide, how):
+    """Fill interior gaps of a (series x time) frame; leading/trailing NaN stay."""
+    if how == "interpolate":
+        return wide.interpolate(axis=1, limit_area="inside")
+    if how == "zero":
+        inside = wide.ffill(axis=1).notna() & wide.bfill(axis=1).notna()
+        return wide.where(~inside | wide.notna(), 0.0)
+    if how == "ffill":
+        return wide.ffill(axis=1)
+    raise ValueError(f"Unknown fill method '{how}'. Use 'interpolate', 'zero' or 'ffill'.")
+
+
+def regularize(df, date_col, target, keys=None, freq=None, agg="sum", fill="interpolate",
+               max_points=10_000):
+    """
+    Put `target` on a regular time grid.
+
+    Rows sharing a timestamp bucket (e.g. several products on one day) are
+    combined with `agg`, missing buckets are filled with `fill`. Returns
+    (wide, freq) where `wide` is a (series x period) float frame indexed by
+    `keys` (one row named `target` when keys is empty) with a regular
+    DatetimeIndex as columns.
+    """
+    keys = list(keys or [])
+    frame = df[keys].copy() if keys else pd.DataFrame(index=df.index)
+    frame["_t"] = as_datetime(df[date_col])
+    frame["_y"] = pd.to_numeric(df[target], errors="coerce")
+    frame = frame.dropna(subset=["_t", "_y"])
+    if frame.empty:
+        return pd.DataFrame(), freq
+
+    freq = freq or infer_frequency(frame["_t"], max_points)
+    grouper = pd.Grouper(key="_t", freq=freq)
+    grouped = frame.groupby(keys + [grouper], observed=True, sort=True)["_y"]
+    agg_values = grouped.sum(min_count=1) if agg == "sum" else grouped.agg(agg)
+
+    if keys:
+        wide = agg_values.unstack("_t")
+    else:
+        wide = agg_values.to_frame(target).T
+    grid = pd.date_range(wide.columns.min(), wide.columns.max(), freq=freq)
+    wide = wide.reindex(columns=grid)
+    return _fill(wide, fill).astype(float), freq
+
+
+def future_dates(last, freq, periods):
+    """The `periods` grid points after `last`."""
+    return pd.date_range(last, periods=periods + 1, freq=freq)[1:]
@@ -1,8 +1,12 @@
 
 #--------------------
 import streamlit as st
-import pandas as pd
 import os
+import numpy as np
+import pandas as pd
+import time
+import uuid
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 
 from Agents.simple_agent import SimpleDataAgent
 from Agents.eda_agent import EDAAgent
@@ -10,15 +14,20 @@ from Agents.chart_agent import ChartAgent
 from Agents.forecast_agent import ForecastAgent
 from Agents.report_agent import ReportAgent
 from Core.supervisor_agent import SupervisorAgent
+from Core.ingest import load_dataset
+from Core.jobs import CANCELLED, FAILED, JobRunner
 from Core.memory_manager import MemoryManager
+from Core.session import Session, SessionRegistry, model_cache, result_cache
 from Core.logger import Logger
 
 # -------------------------------------------------
 # Constants
 # -------------------------------------------------
 ASSETS_DIR = "assets"
-CHART_PATH = f"{ASSETS_DIR}/chart.png"
 REPORT_PATH = f"{ASSETS_DIR}/insightops_report.pptx"
+# Server-side files offered for streaming EDA; nothing outside it is readable
+DATA_DIR = os.path.realpath(os.getenv("INSIGHTOPS_DATA_DIR", "data"))
+DATA_EXTENSIONS = (".csv", ".tsv", ".txt", ".gz", ".zst")
 os.makedirs(ASSETS_DIR, exist_ok=True)
 
 # -------------------------------------------------
@@ -57,41 +66,93 @@ st.markdown('<div class="subtitle">Upload data → Chat → Analyze → Forecast
 
 
 # -------------------------------------------------
-# Memory + Logger
-# -------------------------------------------------
-if "memory" not in st.session_state:
-    st.session_state.memory = MemoryManager()
-
-if "logger" not in st.session_state:
-    st.session_state.logger = Logger()
-
-# -------------------------------------------------
-# Load Agents Once
+# Sessions: agents + memory per browser session,
+# datasets / models / results shared process-wide
 # -------------------------------------------------
-if "agents" not in st.session_state:
-    st.session_state.agents = {
+def build_session(session_id):
+    memory = MemoryManager(session_id=session_id)
+    session_agents = {
         "simple": SimpleDataAgent(),
         "eda": EDAAgent(),
         "chart": ChartAgent(),
-        "forecast": ForecastAgent(),
+        "forecast": ForecastAgent(model_cache=model_cache),
         "report": ReportAgent(),
     }
-
-if "supervisor" not in st.session_state:
-    st.session_state.supervisor = SupervisorAgent(
-        memory_manager=st.session_state.memory,
-        logger=st.session_state.logger
+    session_supervisor = SupervisorAgent(
+        memory_manager=memory,
+        logger=Logger(),
+        result_cache=result_cache
     )
+    return Session(session_id, session_agents, session_supervisor, memory)
+
+
+@st.cache_resource
+def get_sessions():
+    return SessionRegistry(build_session)
+
+
+def current_session_id():
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        return ctx.session_id
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    return st.session_state.session_id
+
+
+session = get_sessions().get(current_session_id())
+supervisor = session.supervisor
+agents = session.agents
+
+
+# -------------------------------------------------
+# Background jobs (shared by all sessions)
+# -------------------------------------------------
+@st.cache_resource
+def get_job_runner():
+    return JobRunner(max_workers=4)
+
+
+jobs = get_job_runner()
 
-supervisor = st.session_state.supervisor
-agents = st.session_state.agents
+
+def data_file_path(name):
+    """Real path of `name` if it is a regular file inside DATA_DIR, else None."""
+    path = os.path.realpath(os.path.join(DATA_DIR, name))
+    if not path.startswith(DATA_DIR + os.sep) or not os.path.isfile(path):
+        return None
+    return path
+
+
+def list_data_files():
+    """Streamable files under DATA_DIR, relative to it."""
+    if not os.path.isdir(DATA_DIR):
+        return []
+    names = []
+    for root, _, files in os.walk(DATA_DIR):
+        for f in files:
+            if f.lower().endswith(DATA_EXTENSIONS):
+                rel = os.path.relpath(os.path.join(root, f), DATA_DIR)
+                if data_file_path(rel) is not None:
+                    names.append(rel)
+    return sorted(names)
 
 # -------------------------------------------------
 # Sidebar
 # -------------------------------------------------
 with st.sidebar:
     st.header("📂 Upload Data")
-    uploaded_file = st.file_uploader("Upload CSV", type=["csv"])
+    uploaded_file = st.file_uploader(
+        "Upload CSV / Parquet / Feather",
+        type=["csv", "tsv", "txt", "gz", "zst", "parquet", "feather", "arrow"]
+    )
+    server_files = list_data_files()
+    large_file = st.selectbox(
+        "…or stream a large server-side file (EDA only)",
+        [""] + server_files,
+        disabled=not server_files,
+        help=f"Files in {DATA_DIR}"
+    )
 
     st.markdown("---")
 
@@ -105,30 +166,39 @@ with st.sidebar:
     - **SupervisorAgent** – routes tasks  
     """)
 
-if not uploaded_file:
-    st.warning("Please upload a CSV file to begin.")
+if not uploaded_file and large_file:
+    # Too large for memory: EDA walks the file in chunks with bounded memory
+    large_path = data_file_path(large_file)
+    if large_path is None:
+        st.error(f"Not an available data file: {large_file}")
+        st.stop()
+    agents["eda"].receive_source(large_path)
+    st.subheader("Out-of-core EDA")
+    if st.button("Run streaming EDA"):
+        with st.spinner("Streaming file in chunks..."):
+            st.write(agents["eda"].analyze_stream())
     st.stop()
 
-# Auto-detect delimiter
-sample = uploaded_file.read().decode("utf-8", errors="ignore")
-uploaded_file.seek(0)  # reset pointer
+if not uploaded_file:
+    st.warning("Please upload a dataset (CSV, Parquet or Feather) to begin.")
+    st.stop()
 
-delimiter = ","
-if ";" in sample and sample.count(";") > sample.count(","):
-    delimiter = ";"
-elif "\t" in sample:
-    delimiter = "\t"
+# Parse + normalize once per distinct upload (reruns hit the cache)
+upload_key, dataset = load_dataset(uploaded_file.getvalue(), name=uploaded_file.name)
 
-df = pd.read_csv(uploaded_file, delimiter=delimiter)
+# The agents are in use while a request runs: keep its dataset until it finishes
+last_job = st.session_state.get("job")
+running_job = jobs.get(last_job["id"]) if last_job else None
+if running_job is not None and not running_job.done and session.dataset_key not in (None, upload_key):
+    st.info("A request is still running on the previous dataset; the new upload loads when it finishes.")
+    upload_key, dataset = session.dataset_key, session.dataset
+df = dataset.df
 
 # -------------------------------------------------
-# Load DF into Agents
+# Load Dataset into Agents (only when the upload changed)
 # -------------------------------------------------
-for agent in agents.values():
-    try:
-        agent.receive_data(df)
-    except Exception as e:
-        st.sidebar.error(f"Agent failed: {e}")
+for agent_name, error in session.load(upload_key, dataset).items():
+    st.sidebar.error(f"Agent failed ({agent_name}): {error}")
 
 # -------------------------------------------------
 # Display Data Preview (Card)
@@ -152,7 +222,32 @@ user_input = st.text_input(
 )
 
 if user_input:
-    response = supervisor.handle_nl(user_input, agents)
+    # Run in the background; reruns re-attach to the same job instead of restarting it
+    job_key = (session.id, session.dataset_key, user_input)
+    last = st.session_state.get("job")
+    job = jobs.get(last["id"]) if last and last["key"] == job_key else None
+    if job is None:
+        job = jobs.submit(supervisor.handle_nl, user_input, agents, key=job_key, name=user_input)
+        st.session_state.job = {"key": job_key, "id": job.id}
+
+    if not job.done:
+        st.progress(job.progress, text=job.message or f"Working on '{user_input}' ({job.elapsed:.0f}s)...")
+        if st.button("Cancel"):
+            job.cancel()
+        time.sleep(0.5)
+        st.rerun()
+
+    if job.status == CANCELLED:
+        st.warning("Request cancelled.")
+        if st.button("Run again"):
+            del st.session_state["job"]
+            st.rerun()
+        st.stop()
+    if job.status == FAILED:
+        st.error(f"Request failed: {job.error.splitlines()[0]}")
+        st.stop()
+
+    response = job.result
     route = response["route"]
     result = response["result"]
 
@@ -161,11 +256,23 @@ if user_input:
     if route == "chart":
         # result is dict from ChartAgent.generate_chart
         if isinstance(result, dict) and result.get("success"):
-            st.success("Chart generated successfully.")
-            # show the NEW chart directly from returned path
-            chart_path = result.get("path", "chart.png")
-            if os.path.exists(chart_path):
-                st.image(chart_path, caption="Generated Chart")
+            if "figure" in result:
+                # interactive: zoom/pan stay in the browser; the slider resamples a window server-side
+                extent = result.get("x_extent")
+                if result["chart_type"] == "line" and extent is not None:
+                    lo, hi = (pd.Timestamp(v).to_pydatetime() if isinstance(v, np.datetime64) else float(v)
+                              for v in extent)
+                    window = st.slider("Resample range", min_value=lo, max_value=hi, value=(lo, hi))
+                    if window != (lo, hi):
+                        result = agents["chart"].generate_interactive("line", x_range=window)
+                st.plotly_chart(result["figure"], use_container_width=True)
+                st.caption(f"{result['points']:,} points drawn from {result['rows']:,} rows")
+            else:
+                st.success("Chart served from cache." if result.get("cached") else "Chart generated successfully.")
+                # show the NEW chart directly from returned path
+                chart_path = result.get("path", "chart.png")
+                if os.path.exists(chart_path):
+                    st.image(chart_path, caption="Generated Chart")
         else:
             st.error(result if isinstance(result, str)
                      else result.get("error", "Chart error."))
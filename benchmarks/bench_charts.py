@@ -0,0 +1,92 @@
+# bench_charts.py
+"""
+Time chart rendering, forecast preparation and the report on a synthetic
+sales extract (the one bench_ingest.py generates).
+
+    python benchmarks/bench_charts.py --rows 400000
+
+Charts are rendered straight to files (no chart cache). The forecast line
+shows how many rows collapse into the regularized series ARIMA is fitted on.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from bench_ingest import make_csv  # noqa: E402
+
+CHART_TYPES = ("line", "bar", "hist", "scatter")
+
+
+def timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - start, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=400_000)
+    parser.add_argument("--charts", nargs="+", choices=CHART_TYPES, default=list(CHART_TYPES))
+    parser.add_argument("--no-report", action="store_true", help="skip the report timing")
+    args = parser.parse_args()
+
+    from Agents.chart_agent import ChartAgent
+    from Agents.eda_agent import EDAAgent
+    from Agents.forecast_agent import ForecastAgent
+    from Agents.report_agent import ReportAgent
+    from Agents.simple_agent import SimpleDataAgent
+    from Core.ingest import load_dataset
+    from Core.supervisor_agent import SupervisorAgent
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.csv")
+        make_csv(path, args.rows)
+        with open(path, "rb") as f:
+            seconds, (_, dataset) = timed(lambda: load_dataset(f.read(), name="bench.csv"))
+        print(f"{args.rows} rows loaded in {seconds:.2f}s")
+
+        chart = ChartAgent()
+        chart.receive_data(dataset)
+        for chart_type in args.charts:
+            out = os.path.join(tmp, f"{chart_type}.png")
+            seconds, result = timed(lambda: chart.generate_chart(output_path=out, chart_type=chart_type))
+            status = "ok" if result.get("success") else result.get("error")
+            print(f"chart {chart_type:<8}{seconds:>8.2f}s  {status}")
+
+        forecast = ForecastAgent()
+        forecast.receive_data(dataset)
+        seconds, series = timed(forecast._prepare_series)
+        print(f"forecast series: {args.rows} rows -> {len(series)} points "
+              f"({series.index.freqstr if hasattr(series.index, 'freqstr') else 'rows'}) in {seconds:.2f}s")
+
+        if args.no_report:
+            return
+        agents = {
+            "simple": SimpleDataAgent(),
+            "eda": EDAAgent(),
+            "chart": ChartAgent(),
+            "forecast": forecast,
+            "report": ReportAgent(),
+        }
+        for agent in agents.values():
+            agent.receive_data(dataset)
+        supervisor = SupervisorAgent(memory_manager=None)
+        supervisor.receive_data(dataset)
+        cwd = os.getcwd()
+        os.chdir(tmp)  # the deck and charts are written under ./assets
+        try:
+            seconds, result = timed(lambda: supervisor._report(agents))
+        finally:
+            os.chdir(cwd)
+        status = "ok" if isinstance(result, str) else result
+        print(f"report          {seconds:>8.2f}s  {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# bench_forecast.py
+"""
+Backtest the forecast engines on a CSV's target series.
+
+    python benchmarks/bench_forecast.py sample_sales.csv --days 7 --folds 5
+
+Prints mean MAE/MAPE/sMAPE, seconds per fit and peak MB for every engine,
+and the engine ForecastAgent would pick with engine="auto".
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from Agents.forecast_agent import ForecastAgent  # noqa: E402
+from Core.ingest import load_dataset  # noqa: E402
+from ml.backtest import ENGINES  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--days", type=int, default=7, help="forecast horizon per fold")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--target", help="column to forecast (default: ForecastAgent's choice)")
+    parser.add_argument("--engines", nargs="+", choices=sorted(ENGINES))
+    parser.add_argument("--budget", type=float, help="max seconds per fit for the pick")
+    args = parser.parse_args()
+
+    with open(args.path, "rb") as f:
+        _, dataset = load_dataset(f.read(), name=os.path.basename(args.path))
+    agent = ForecastAgent()
+    agent.receive_data(dataset)
+    if args.target:
+        agent.target_col = args.target
+
+    start = time.perf_counter()
+    out = agent.benchmark(args.days, engines=args.engines, folds=args.folds, budget_s=args.budget)
+    if "error" in out:
+        sys.exit(out["error"])
+    print(out["summary"].round(3).to_string())
+    print(f"\npicked: {out['engine']}  ({time.perf_counter() - start:.1f}s total)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# bench_ingest.py
+"""
+Compare upload ingestion: the legacy app.py path vs Core.ingest.
+
+    python benchmarks/bench_ingest.py --rows 2000000
+
+Each path runs in a fresh interpreter so peak RSS is measured in isolation.
+"""
+import argparse
+import gzip
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def make_csv(path, rows, seed=0):
+    """Synthetic sales extract shaped like sample_sales.csv."""
+    rng = np.random.default_rng(seed)
+    products = ["Alpha Phone", "Beta Laptop", "Gamma Watch", "Delta Tablet", "Omega Buds"]
+    df = pd.DataFrame({
+        "Date": pd.date_range("2020-01-01", periods=rows, freq="min").strftime("%Y-%m-%d"),
+        "Product": rng.choice(products, rows),
+        "Category": rng.choice(["Electronics", "Accessories", "Wearables"], rows),
+        "Region": rng.choice(["North", "South", "East", "West"], rows),
+        "Units_Sold": rng.integers(50, 300, rows),
+        "Unit_Price": rng.integers(20, 1500, rows),
+        "Revenue": rng.integers(1000, 400000, rows),
+        "Marketing_Spend": rng.integers(100, 5000, rows),
+        "Customer_Rating": rng.integers(30, 51, rows) / 10,
+    })
+    df.to_csv(path, index=False)
+
+
+def legacy(data):
+    """What app.py did before Core.ingest: full decode, read_csv, per-agent copies."""
+    sample = data.decode("utf-8", errors="ignore")
+    delimiter = ";" if sample.count(";") > sample.count(",") else ","
+    df = pd.read_csv(pd.io.common.BytesIO(data), delimiter=delimiter)
+    frames = []
+    for _ in range(2):  # ChartAgent + ForecastAgent each copied and coerced
+        copy = df.copy()
+        copy["Date"] = pd.to_datetime(copy["Date"], errors="coerce")
+        for col in copy.columns:
+            if col != "Date":
+                copy[col] = pd.to_numeric(copy[col], errors="coerce")
+        frames.append(copy)
+    return df, frames
+
+
+def current(data):
+    from Core.ingest import load_dataset
+    return load_dataset(data, name="bench.csv")
+
+
+def peak_rss_mb():
+    """Peak RSS of this process (VmHWM resets on exec, ru_maxrss does not)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_child(mode, path):
+    with open(path, "rb") as f:
+        data = f.read()
+    start = time.perf_counter()
+    result = legacy(data) if mode == "legacy" else current(data)
+    elapsed = time.perf_counter() - start
+    frame = result[0] if mode == "legacy" else result[1].df
+    print(f"{elapsed:.3f} {peak_rss_mb():.1f} {frame.memory_usage(deep=True).sum() / 1024 ** 2:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--gzip", action="store_true", help="also time a gzip-compressed upload")
+    parser.add_argument("--run", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_child(*args.run)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.csv")
+        make_csv(path, args.rows)
+        cases = [("legacy", path), ("ingest", path)]
+        if args.gzip:
+            gz_path = path + ".gz"
+            with open(path, "rb") as src, gzip.open(gz_path, "wb") as dst:
+                dst.write(src.read())
+            cases.append(("ingest", gz_path))
+
+        print(f"{args.rows} rows, {os.path.getsize(path) / 1024 ** 2:.1f} MB CSV")
+        print(f"{'path':<20}{'seconds':>10}{'peak RSS MB':>14}{'frame MB':>12}")
+        for mode, p in cases:
+            out = subprocess.run(
+                [sys.executable, __file__, "--run", mode, p],
+                capture_output=True, text=True, check=True,
+            ).stdout.split()
+            label = mode + (" (gzip)" if p.endswith(".gz") else "")
+            print(f"{label:<20}{out[0]:>10}{out[1]:>14}{out[2]:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Rolling-origin backtests for the forecast engines.
+
+Each engine is refit on every fold's training window and scored on the next
+`h` points; folds run in parallel on the shared process pool. `summarize` averages
+accuracy (MAE/MAPE/sMAPE), wall time and peak memory per engine, and
+`choose_engine` turns that into a pick that trades error against latency.
+"""
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from Core.jobs import report_progress
+from Core.process_pool import PROCESS_WORKERS, get_pool
+from ml import baselines
+
+
+def _arima(values, h):
+    from pmdarima import auto_arima
+
+    model = auto_arima(values, seasonal=False, stepwise=True, trace=False,
+                       error_action="ignore", suppress_warnings=True)
+    return np.asarray(model.predict(h))
+
+
+def _baseline(name):
+    def run(values, h):
+        return baselines.forecast(values[None, :], h, name)[0]
+    run.__name__ = name
+    return run
+
+
+ENGINES = {
+    "arima": _arima,
+    "linear": _baseline("linear"),
+    "naive": _baseline("naive"),
+    "seasonal_naive": _baseline("seasonal_naive"),
+    "ses": _baseline("ses"),
+    "holt": _baseline("holt"),
+}
+
+
+def rolling_origins(n, h, folds=5, min_train=20):
+    """Training-window lengths for up to `folds` origins, the last one ending at n - h."""
+    last = n - h
+    if last < min_train:
+        return []
+    step = max(1, h)
+    cutoffs = list(range(last, min_train - 1, -step))[:folds]
+    return sorted(cutoffs)
+
+
+def errors(actual, predicted):
+    """MAE, MAPE (%) and sMAPE (%) of one fold; zero actuals are left out of MAPE."""
+    actual = np.asarray(actual, dtype=float)
+    predicted = np.asarray(predicted, dtype=float)
+    diff = np.abs(actual - predicted)
+    nonzero = actual != 0
+    denom = np.abs(actual) + np.abs(predicted)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mape = 100 * np.mean(diff[nonzero] / np.abs(actual[nonzero])) if nonzero.any() else np.nan
+        smape = 100 * np.mean(np.where(denom > 0, 2 * diff / denom, 0.0))
+    return {"mae": float(diff.mean()), "mape": float(mape), "smape": float(smape)}
+
+
+def _run_folds(tasks, values, h, measure_memory):
+    """Process-pool worker: score a batch of (engine, cutoff) pairs."""
+    rows = []
+    for engine, cutoff in tasks:
+        train, test = values[:cutoff], values[cutoff:cutoff + h]
+        if measure_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            fc = ENGINES[engine](train, h)
+            error = None
+        except Exception as e:
+            fc = np.full(h, np.nan)
+            error = str(e)
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if measure_memory else np.nan
+        if measure_memory:
+            tracemalloc.stop()
+        row = {"engine": engine, "cutoff": cutoff, "seconds": seconds, "peak_mb": peak / 1024 ** 2,
+               "error": error}
+        row.update(errors(test, fc))
+        rows.append(row)
+    return rows
+
+
+def backtest(values, h=7, engines=None, folds=5, min_train=20, max_workers=None,
+             measure_memory=True):
+    """
+    Rolling-origin backtest of `engines` (default: all of ENGINES) on one series.
+
+    Returns one row per (engine, fold): engine, cutoff, seconds, peak_mb,
+    error, mae, mape, smape. Peak memory is traced with tracemalloc, which
+    slows the fit a little; pass measure_memory=False for timing only.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    engines = list(engines or ENGINES)
+    unknown = [e for e in engines if e not in ENGINES]
+    if unknown:
+        raise ValueError(f"Unknown engines {unknown}. Choose from {sorted(ENGINES)}.")
+
+    cutoffs = rolling_origins(len(values), h, folds, min_train)
+    tasks = [(e, c) for e in engines for c in cutoffs]
+    if not tasks:
+        return pd.DataFrame(columns=["engine", "cutoff", "seconds", "peak_mb", "error",
+                                     "mae", "mape", "smape"])
+
+    workers = min(max_workers or PROCESS_WORKERS, PROCESS_WORKERS)
+    if workers == 1 or len(tasks) == 1:
+        rows = _run_folds(tasks, values, h, measure_memory)
+    else:
+        # slow and fast engines interleaved so batches take similar time
+        batches = [tasks[i::workers] for i in range(min(workers, len(tasks)))]
+        rows = []
+        results = get_pool().map(_run_folds, batches, [values] * len(batches),
+                                 [h] * len(batches), [measure_memory] * len(batches))
+        for i, batch_rows in enumerate(results, start=1):
+            rows.extend(batch_rows)
+            report_progress(i / len(batches), f"Backtested {i}/{len(batches)} batches")
+    return pd.DataFrame(rows).sort_values(["engine", "cutoff"], ignore_index=True)
+
+
+def summarize(results):
+    """Mean accuracy, time and memory per engine, most accurate (sMAPE) first."""
+    if results.empty:
+        return pd.DataFrame(columns=["mae", "mape", "smape", "seconds", "peak_mb", "folds", "failures"])
+    grouped = results.groupby("engine")
+    summary = grouped[["mae", "mape", "smape", "seconds", "peak_mb"]].mean()
+    summary["folds"] = grouped.size()
+    summary["failures"] = grouped["error"].count()
+    return summary.sort_values("smape")
+
+
+def choose_engine(summary, metric="smape", latency_weight=0.1, budget_s=None, min_seconds=0.01):
+    """
+    Pick an engine from `summarize()` output.
+
+    Score = error / best error + latency_weight * log10(seconds / fastest),
+    so at the default weight an engine 10x slower than the fastest must be
+    about 10% more accurate to win. Fit times under `min_seconds` count as
+    equal (timer noise). Engines slower than `budget_s` per fit, or that
+    failed on any fold, are skipped.
+    """
+    ok = summary[(summary["failures"] == 0) & summary[metric].notna()]
+    if budget_s is not None:
+        ok = ok[ok["seconds"] <= budget_s]
+    if ok.empty:
+        return "linear"
+    err = ok[metric] / max(ok[metric].min(), 1e-12)
+    seconds = ok["seconds"].clip(lower=min_seconds)
+    lat = np.log10(seconds / seconds.min())
+    score = err + latency_weight * lat
+    return score.idxmin()
@@ -0,0 +1,144 @@
+"""
+Closed-form baseline forecasters vectorized over many series.
+
+Every model takes a 2-D array `Y` (series x time, right-aligned so the last
+column is the latest observation; NaN = missing or padding) and a horizon
+`h`, and returns an (n_series, h) array of forecasts in one call.
+"""
+import numpy as np
+
+ALPHAS = np.linspace(0.1, 0.9, 9)
+
+
+def align_series(series):
+    """Right-align a list of 1-D arrays into a NaN-padded 2-D array."""
+    T = max((len(s) for s in series), default=0)
+    Y = np.full((len(series), T), np.nan)
+    for i, s in enumerate(series):
+        if len(s):
+            Y[i, T - len(s):] = s
+    return Y
+
+
+def _ffill(Y):
+    """Forward-fill NaNs along time (leading NaNs stay NaN)."""
+    idx = np.where(~np.isnan(Y), np.arange(Y.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    return Y[np.arange(Y.shape[0])[:, None], idx]
+
+
+def linear_trend(Y, h):
+    """Least-squares line per series, extrapolated h steps."""
+    T = Y.shape[1]
+    t = np.arange(T, dtype=float)
+    w = ~np.isnan(Y)
+    y = np.where(w, Y, 0.0)
+    n = w.sum(axis=1)
+    st, sy = w @ t, y.sum(axis=1)
+    stt, sty = w @ (t * t), y @ t
+    with np.errstate(invalid="ignore", divide="ignore"):
+        denom = n * stt - st * st
+        slope = np.where(denom > 0, (n * sty - st * sy) / denom, 0.0)
+        intercept = (sy - slope * st) / n
+    future = np.arange(T, T + h, dtype=float)
+    return intercept[:, None] + slope[:, None] * future[None, :]
+
+
+def naive(Y, h):
+    """Last observed value repeated."""
+    last = _ffill(Y)[:, -1]
+    return np.repeat(last[:, None], h, axis=1)
+
+
+def seasonal_naive(Y, h, season=7):
+    """Repeat the last full season; falls back to naive for short series."""
+    if Y.shape[1] < season:
+        return naive(Y, h)
+    last = _ffill(Y)[:, -season:]
+    reps = int(np.ceil(h / season))
+    return np.tile(last, reps)[:, :h]
+
+
+def moving_average(Y, h, window=7):
+    """Mean of the last `window` observations."""
+    with np.errstate(invalid="ignore"):
+        level = np.nanmean(Y[:, -window:], axis=1)
+    missing = np.isnan(level)
+    if missing.any():
+        level[missing] = naive(Y[missing], 1)[:, 0]
+    return np.repeat(level[:, None], h, axis=1)
+
+
+def _smooth(Y, alpha, beta=None):
+    """
+    Run simple (beta=None) or Holt exponential smoothing for every series and
+    every candidate alpha at once. `alpha`/`beta` broadcast against (A, N).
+    Returns (level, trend, sse) each shaped (A, N).
+    """
+    N, T = Y.shape
+    A = np.broadcast(alpha, beta if beta is not None else alpha).shape[0]
+    level = np.full((A, N), np.nan)
+    trend = np.zeros((A, N))
+    sse = np.zeros((A, N))
+    for t in range(T):
+        y = Y[:, t]
+        obs = ~np.isnan(y)
+        if not obs.any():
+            continue
+        init = obs & np.isnan(level[0])
+        level[:, init] = y[init]
+        upd = obs & ~init
+        if upd.all():
+            # fast path: every series observed and initialized
+            pred = level + trend
+            err = y - pred
+            sse += err * err
+            new_level = pred + alpha * err
+            if beta is not None:
+                trend += beta * (new_level - level - trend)
+            level = new_level
+        elif upd.any():
+            pred = level[:, upd] + trend[:, upd]
+            err = y[upd] - pred
+            sse[:, upd] += err * err
+            new_level = pred + alpha * err
+            if beta is not None:
+                trend[:, upd] = trend[:, upd] + beta * (new_level - level[:, upd] - trend[:, upd])
+            level[:, upd] = new_level
+    return level, trend, sse
+
+
+def ses(Y, h, alpha=None):
+    """Simple exponential smoothing; alpha picked per series by one-step SSE."""
+    alphas = ALPHAS[:, None] if alpha is None else np.array([[alpha]])
+    level, _, sse = _smooth(Y, alphas)
+    best = np.argmin(sse, axis=0)
+    lvl = level[best, np.arange(Y.shape[0])]
+    return np.repeat(lvl[:, None], h, axis=1)
+
+
+def holt(Y, h, alpha=None, beta=0.1):
+    """Holt's linear-trend smoothing; alpha picked per series by one-step SSE."""
+    alphas = ALPHAS[:, None] if alpha is None else np.array([[alpha]])
+    level, trend, sse = _smooth(Y, alphas, beta)
+    best = np.argmin(sse, axis=0)
+    cols = np.arange(Y.shape[0])
+    steps = np.arange(1, h + 1)
+    return level[best, cols][:, None] + trend[best, cols][:, None] * steps[None, :]
+
+
+MODELS = {
+    "linear": linear_trend,
+    "naive": naive,
+    "seasonal_naive": seasonal_naive,
+    "moving_average": moving_average,
+    "ses": ses,
+    "holt": holt,
+}
+
+
+def forecast(Y, h, model="holt", **kwargs):
+    """Forecast every row of `Y` with the named baseline model."""
+    if model not in MODELS:
+        raise ValueError(f"Unknown baseline model '{model}'. Choose from {sorted(MODELS)}.")
+    return MODELS[model](np.asarray(Y, dtype=float), h, **kwargs)
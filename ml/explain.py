@@ -1,59 +1,60 @@
+import inspect
+
 import shap
-import matplotlib.pyplot as plt
 import pandas as pd
-import os
+
+from Core.render import new_figure, pyplot_figure, save_figure
+
+
+def _accepts_ax(plot):
+    try:
+        return "ax" in inspect.signature(plot).parameters
+    except (TypeError, ValueError):
+        return False
+
 
 class ShapExplainer:
     """
     Unified SHAP explainer used by InsightOps ML module.
     Produces saved image files instead of blocking visualizations.
+
+    Plots that accept an `ax` are drawn on a standalone Figure and can run
+    from several threads at once; the rest go through the pyplot lock.
     """
 
     def __init__(self, model):
         self.model = model
 
-    def _ensure_dir(self, path):
-        os.makedirs(os.path.dirname(path), exist_ok=True)
+    def _shap_values(self, X):
+        explainer = shap.Explainer(self.model, X)
+        return explainer(X)
+
+    def _plot(self, plot, args, path, figsize, **save_kwargs):
+        if _accepts_ax(plot):
+            fig = new_figure(figsize=figsize)
+            plot(*args, ax=fig.add_subplot(), show=False)
+            fig.tight_layout()
+            return save_figure(fig, path, **save_kwargs)
+        with pyplot_figure(figsize=figsize) as fig:
+            plot(*args, show=False)
+            fig.tight_layout()
+            return save_figure(fig, path, **save_kwargs)
 
     def summary_plot(self, X: pd.DataFrame, path="assets/shap_summary.png"):
         """Generate a SHAP summary bar plot and save it."""
-        self._ensure_dir(path)
-
-        explainer = shap.Explainer(self.model, X)
-        shap_values = explainer(X)
-
-        plt.figure(figsize=(8, 6))
-        shap.plots.bar(shap_values.mean(0), show=False)
-
-        plt.tight_layout()
-        plt.savefig(path)
-        plt.close()
-
-        return path
+        shap_values = self._shap_values(X)
+        return self._plot(shap.plots.bar, (shap_values.mean(0),), path, (8, 6))
 
     def full_summary(self, X: pd.DataFrame, path="assets/shap_full_summary.png"):
         """A full beeswarm summary plot (like your original file)."""
-        self._ensure_dir(path)
-
-        explainer = shap.Explainer(self.model, X)
-        shap_values = explainer(X)
-
-        plt.figure(figsize=(10, 6))
-        shap.summary_plot(shap_values, X, show=False)
-        plt.savefig(path, bbox_inches="tight")
-        plt.close()
-
-        return path
+        shap_values = self._shap_values(X)
+        return self._plot(shap.plots.beeswarm, (shap_values,), path, (10, 6), bbox_inches="tight")
 
     def force_plot(self, X: pd.DataFrame, row_idx: int, path="assets/shap_force.png"):
         """Generate a force plot for a specific row."""
-        self._ensure_dir(path)
-
-        explainer = shap.Explainer(self.model, X)
-        shap_values = explainer(X)
-
-        shap.plots.force(shap_values[row_idx], matplotlib=True, show=False)
-        plt.savefig(path)
-        plt.close()
+        shap_values = self._shap_values(X)
 
-        return path
+        # the matplotlib force plot always draws on pyplot's current figure
+        with pyplot_figure():
+            fig = shap.plots.force(shap_values[row_idx], matplotlib=True, show=False)
+            return save_figure(fig, path)
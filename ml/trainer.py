@@ -5,30 +5,54 @@ from sklearn.ensemble import RandomForestRegressor
 from sklearn.linear_model import LinearRegression
 from sklearn.model_selection import cross_val_score
 
+from Core.shared_memory import attach
+
+
+def _compare_models():
+    return {
+        "LinearRegression": LinearRegression(),
+        "RandomForest": RandomForestRegressor(n_estimators=60, random_state=42),
+    }
+
+
+def _features(df, target):
+    # Only numeric + fill missing
+    X = df.drop(columns=[target]).select_dtypes(include="number").fillna(0)
+    y = df[target].fillna(0)
+    return X, y
+
+
+def _cv_score(model, X, y):
+    try:
+        return cross_val_score(model, X, y, cv=3, scoring="r2").mean()
+    except Exception:
+        return None
+
+
+def _cv_score_shared(handle, target, name):
+    """Process-pool worker: score one model on the shared-memory dataset."""
+    X, y = _features(attach(handle).df, target)
+    return name, _cv_score(_compare_models()[name], X, y)
+
+
 class ModelTrainer:
     def __init__(self, df: pd.DataFrame, target: str):
-        self.df = df.copy()
+        self.df = df  # read-only here: features are built on new frames
         self.target = target
 
-    def quick_compare(self):
-        # Only numeric + fill missing
-        X = self.df.drop(columns=[self.target]).select_dtypes(include="number").fillna(0)
-        y = self.df[self.target].fillna(0)
-
-        models = {
-            "LinearRegression": LinearRegression(),
-            "RandomForest": RandomForestRegressor(n_estimators=60, random_state=42),
-        }
-
-        results = {}
-        for name, model in models.items():
-            try:
-                score = cross_val_score(model, X, y, cv=3, scoring="r2").mean()
-            except Exception:
-                score = None
-            results[name] = score
+    def quick_compare(self, pool=None, handle=None):
+        """
+        Cross-validated R^2 per model. With a process `pool` and a shared
+        dataset `handle` (Core/shared_memory.py) the models are scored in
+        parallel; workers attach to the data instead of receiving a copy.
+        """
+        if pool is not None and handle is not None:
+            futures = [pool.submit(_cv_score_shared, handle, self.target, name)
+                       for name in _compare_models()]
+            return dict(f.result() for f in futures)
 
-        return results
+        X, y = _features(self.df, self.target)
+        return {name: _cv_score(model, X, y) for name, model in _compare_models().items()}
 
     def train(self, model_type="rf"):
         X = self.df.drop(columns=[self.target]).select_dtypes(include="number").fillna(0)
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Agents.forecast_agent import ForecastAgent
+from Core.cache import LRUCache
+from Core.dataset import Dataset
+
+
+def _daily(n=60, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Date": pd.date_range("2024-01-01", periods=n, freq="D"),
+        "Revenue": 100 + np.cumsum(rng.normal(0, 1, n)),
+    })
+
+
+def test_agents_share_an_empty_model_cache():
+    cache = LRUCache()
+    dataset = Dataset.from_frame(_daily())
+    first, second = ForecastAgent(model_cache=cache), ForecastAgent(model_cache=cache)
+    assert first.models is cache and second.models is cache
+
+    first.receive_data(dataset)
+    assert "cached model" not in first.forecast(days=3)["insights"]
+    second.receive_data(dataset)
+    assert "cached model" in second.forecast(days=3)["insights"]
+
+
+def _ragged_groups():
+    # group A runs to the end of February, group B stops on 2024-01-20
+    a = pd.DataFrame({"Date": pd.date_range("2024-01-01", "2024-02-29", freq="D"), "Store": "A"})
+    b = pd.DataFrame({"Date": pd.date_range("2024-01-01", "2024-01-20", freq="D"), "Store": "B"})
+    df = pd.concat([a, b], ignore_index=True)
+    df["Revenue"] = np.random.default_rng(1).normal(100, 5, len(df))
+    return Dataset.from_frame(df)
+
+
+@pytest.mark.parametrize("engine", ["baseline", "arima"])
+def test_group_forecast_dated_from_each_series_end(engine):
+    agent = ForecastAgent()
+    agent.receive_data(_ragged_groups())
+    fc = agent.forecast_groups(days=3, keys=["Store"], target="Revenue", engine=engine,
+                               max_workers=1)["forecast"]
+    dates = {store: list(g["date"]) for store, g in fc.groupby("Store")}
+    assert dates["A"] == list(pd.date_range("2024-03-01", periods=3, freq="D"))
+    assert dates["B"] == list(pd.date_range("2024-01-21", periods=3, freq="D"))
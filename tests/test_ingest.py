@@ -0,0 +1,26 @@
+import pandas as pd
+import pytest
+
+from Core import ingest
+
+
+def _wrapped_csv(rows=40):
+    # sample_sales.csv style: BOM, and each whole line quoted as one field
+    regions, products = ["North", "South", "East", "West"], ["Alpha Phone", "Beta Laptop"]
+    lines = ['"Region,Units_Sold,Revenue,Product"']
+    lines += [f'"{regions[i % 4]},{100 + i},{1000 + 10 * i},{products[i % 2]}"' for i in range(rows)]
+    return ("\ufeff" + "\n".join(lines) + "\n").encode("utf-8")
+
+
+@pytest.mark.parametrize("engine", ["pyarrow", "pandas"])
+def test_wrapped_edge_columns_load_as_categoricals(engine, monkeypatch):
+    if engine == "pandas":
+        monkeypatch.setattr(ingest, "pa_csv", None)
+    df = ingest.read_table(_wrapped_csv(), name="sales.csv")
+
+    assert list(df.columns) == ["Region", "Units_Sold", "Revenue", "Product"]
+    for col in ("Region", "Product"):
+        assert isinstance(df[col].dtype, pd.CategoricalDtype)
+    assert sorted(df["Region"].cat.categories) == ["East", "North", "South", "West"]
+    assert sorted(df["Product"].cat.categories) == ["Alpha Phone", "Beta Laptop"]
+    assert df["Units_Sold"].iloc[0] == 100
@@ -0,0 +1,21 @@
+import gc
+import os
+
+from Core.memory_manager import MemoryManager
+
+
+def _manager(tmp_path):
+    return MemoryManager(session_id="s1", session_dir=str(tmp_path / "session_storage"),
+                         memory_file=str(tmp_path / "memory_bank.jsonl"), flush_interval=3600)
+
+
+def test_buffered_records_survive_garbage_collection(tmp_path):
+    memory = _manager(tmp_path)
+    keys = [memory.remember_message({"user": f"question {i}"}) for i in range(3)]
+    assert not os.path.exists(tmp_path / "session_storage" / "s1.jsonl")  # still buffered
+
+    del memory
+    gc.collect()
+
+    reopened = _manager(tmp_path)
+    assert [reopened.recall_session(k) for k in keys] == [{"user": f"question {i}"} for i in range(3)]
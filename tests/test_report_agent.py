@@ -0,0 +1,32 @@
+import numpy as np
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+
+from Agents.report_agent import DEFAULT_TEMPLATE, ReportAgent, _ImageIndex, _open_deck
+from Core.render import figure_bytes, new_figure
+
+
+def _png(seed):
+    fig = new_figure(figsize=(3, 2))
+    fig.add_subplot().plot(np.random.default_rng(seed).random(20))
+    return figure_bytes(fig, dpi=50)
+
+
+def test_image_index_replaces_pptx_lookup():
+    # fails when python-pptx renames or drops the internals the index replaces
+    package = _open_deck(DEFAULT_TEMPLATE).part.package
+    assert isinstance(package._image_parts, _ImageIndex)
+
+
+def test_deck_shares_repeated_images(tmp_path):
+    a, b = _png(0), _png(1)
+    sections = [{"title": str(i), "table": {"Rows": "1"}, "chart": (lambda img=img: img)}
+                for i, img in enumerate([a, b, a])]
+    path = ReportAgent().generate(str(tmp_path / "deck.pptx"), chart_path=b, sections=sections)
+
+    prs = Presentation(path)
+    pictures = [shape for slide in prs.slides for shape in slide.shapes if shape.shape_type == MSO_SHAPE_TYPE.PICTURE]
+    images = {p.partname: p for p in prs.part.package.iter_parts() if p.content_type == "image/png"}
+    assert len(pictures) == 4
+    assert len(images) == 2
+    assert {pic.image.sha1 for pic in pictures} == {img.sha1 for img in images.values()}
@@ -0,0 +1,64 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Core import shared_memory
+from Core.dataset import Dataset
+from ml.trainer import ModelTrainer
+
+
+def _dataset(seed=0, n=300):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "Date": pd.date_range("2024-01-01", periods=n, freq="h"),
+        "Region": rng.choice(["North", "South"], n),
+        "Units": rng.integers(1, 50, n).astype(float),
+        "Price": rng.random(n) * 10,
+    })
+    df["Revenue"] = df["Units"] * df["Price"]
+    return Dataset.from_frame(df)
+
+
+def _summarize(handle):
+    df = shared_memory.attach(handle).df
+    return float(df["Revenue"].sum()), df["Region"].value_counts().to_dict(), str(df["Date"].max())
+
+
+@pytest.fixture(autouse=True)
+def _clean():
+    yield
+    shared_memory.detach()
+    shared_memory.release()
+
+
+def test_worker_sees_the_published_dataset():
+    dataset = _dataset()
+    handle = shared_memory.publish(dataset)
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        total, regions, last = pool.submit(_summarize, handle).result()
+    df = dataset.df
+    assert total == pytest.approx(df["Revenue"].sum())
+    assert regions == df["Region"].value_counts().to_dict()
+    assert last == str(df["Date"].max())
+
+
+def test_attachments_are_bounded_and_detachable():
+    handles = [shared_memory.publish(_dataset(seed)) for seed in range(shared_memory.MAX_ATTACHED + 2)]
+    for handle in handles:
+        shared_memory.attach(handle)
+    assert list(shared_memory._attached) == [h.shm_name for h in handles[-shared_memory.MAX_ATTACHED:]]
+    shared_memory.detach(handles[-1].shm_name)
+    assert handles[-1].shm_name not in shared_memory._attached
+    shared_memory.detach()
+    assert not shared_memory._attached
+
+
+def test_quick_compare_on_shared_memory_matches_in_process():
+    dataset = _dataset()
+    trainer = ModelTrainer(dataset.df, "Revenue")
+    assert trainer.df is dataset.df  # no private copy
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        shared = trainer.quick_compare(pool=pool, handle=shared_memory.publish(dataset))
+    assert shared == pytest.approx(trainer.quick_compare())